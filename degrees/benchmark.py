@@ -0,0 +1,162 @@
+"""
+Benchmarks for degrees searches on synthetic graphs.
+
+Usage: python benchmark.py search [edges] [queries]
+       python benchmark.py frontier [nodes]
+"""
+
+import random
+import sys
+import time
+
+import degrees
+from graph import CompactGraph
+from util import Node, QueueFrontier
+
+
+class ListQueueFrontier():
+    """
+    The list-copying queue frontier util.py used to have, kept for comparison.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def synthetic_graph(n_edges, seed=0):
+    """
+    Returns (person_ids, movie_ids, edges) for a random bipartite graph
+    of about `n_edges` star credits. Casts are small and a few prolific
+    people appear in many movies, like in the IMDB data.
+    """
+    rng = random.Random(seed)
+    n_movies = n_edges // 5
+    n_people = n_edges // 3
+    person_ids = [str(i) for i in range(n_people)]
+    movie_ids = [str(10 ** 7 + i) for i in range(n_movies)]
+    edges = []
+    for movie_id in movie_ids:
+        for _ in range(rng.randint(2, 8)):
+            p = int(rng.paretovariate(1.1) * 50) % n_people
+            edges.append((person_ids[p], movie_id))
+    return person_ids, movie_ids, edges
+
+
+def load_synthetic(person_ids, movie_ids, edges, compact):
+    """
+    Fills the degrees module's data structures as load_data would.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    for person_id in person_ids:
+        degrees.people[person_id] = {"name": person_id, "birth": ""}
+    for movie_id in movie_ids:
+        degrees.movies[movie_id] = {"title": movie_id, "year": ""}
+
+    if compact:
+        degrees.graph = CompactGraph.from_edges(person_ids, movie_ids, edges)
+        return
+
+    degrees.graph = None
+    for person in degrees.people.values():
+        person["movies"] = set()
+    for movie in degrees.movies.values():
+        movie["stars"] = set()
+    for person_id, movie_id in edges:
+        degrees.people[person_id]["movies"].add(movie_id)
+        degrees.movies[movie_id]["stars"].add(person_id)
+
+
+def time_queries(pairs, bidirectional):
+    """
+    Returns (seconds, path lengths) for answering every pair.
+    """
+    lengths = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        path = degrees.shortest_path(source, target, bidirectional=bidirectional)
+        lengths.append(None if path is None else len(path))
+    return time.perf_counter() - start, lengths
+
+
+def time_frontier(frontier, n_nodes):
+    """
+    Returns seconds taken to push `n_nodes` nodes through `frontier`,
+    checking contains_state and a visited list/set as BFS does.
+    """
+    start = time.perf_counter()
+    visited = [0] if isinstance(frontier, ListQueueFrontier) else {0}
+    frontier.add(Node(0, None, None))
+    next_state = 1
+    while not frontier.empty():
+        node = frontier.remove()
+        for state in (next_state, next_state + 1):
+            if state >= n_nodes or state in visited or frontier.contains_state(state):
+                continue
+            frontier.add(Node(state, node, None))
+            if isinstance(visited, list):
+                visited.append(state)
+            else:
+                visited.add(state)
+        next_state += 2
+    return time.perf_counter() - start
+
+
+def benchmark_frontier(n_nodes):
+    """
+    Compares the list-copying and deque-backed queue frontiers.
+    """
+    before = time_frontier(ListQueueFrontier(), n_nodes)
+    after = time_frontier(QueueFrontier(), n_nodes)
+    print(f"{n_nodes} nodes: list frontier {before * 1000:.1f} ms, "
+          f"deque frontier {after * 1000:.1f} ms ({before / after:.1f}x)")
+
+
+def benchmark_search(n_edges, n_queries):
+    """
+    Compares one-sided and bidirectional shortest_path on both backends.
+    """
+    print(f"Generating graph with about {n_edges} edges...")
+    person_ids, movie_ids, edges = synthetic_graph(n_edges)
+    rng = random.Random(1)
+    pairs = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(n_queries)]
+
+    for compact in (False, True):
+        load_synthetic(person_ids, movie_ids, edges, compact)
+        backend = "compact" if compact else "dict"
+        one_sided, expected = time_queries(pairs, False)
+        two_sided, lengths = time_queries(pairs, True)
+        if lengths != expected:
+            sys.exit(f"{backend}: bidirectional path lengths differ")
+        print(f"{backend:>8}: one-sided {one_sided / n_queries * 1000:8.2f} ms/query, "
+              f"bidirectional {two_sided / n_queries * 1000:8.2f} ms/query "
+              f"({one_sided / two_sided:.1f}x)")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("search", "frontier"):
+        sys.exit("Usage: python benchmark.py search [edges] [queries]\n"
+                 "       python benchmark.py frontier [nodes]")
+    args = [int(arg) for arg in sys.argv[2:]]
+    if sys.argv[1] == "frontier":
+        benchmark_frontier(*(args or [20_000]))
+    else:
+        benchmark_search(*(args or [1_000_000, 20]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Precomputed co-star adjacency for the compact degrees graph.
+"""
+
+import threading
+from array import array
+from collections import OrderedDict
+
+
+class CoStarIndex():
+    """
+    Deduplicated person -> co-star adjacency over a CompactGraph, keeping
+    one witness movie (the lowest movie index they share) per co-star.
+
+    Lists are stored in CSR arrays, except for hubs with more than
+    `hub_size` co-stars and anyone past `max_entries` stored co-stars in
+    total. Their lists are rebuilt from the graph when needed and the
+    `cache_size` most recently used ones are kept in an LRU cache.
+    """
+
+    def __init__(self, graph, max_entries=20_000_000, hub_size=10_000, cache_size=256):
+        self.graph = graph
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+
+        n = len(graph.person_ids)
+        self.stored = bytearray(n)
+        self.offsets = array("q", [0])
+        self.costars = array("i")
+        self.witnesses = array("i")
+        for p in range(n):
+            if len(self.costars) < max_entries:
+                row = self.compute(p)
+                if len(row) <= hub_size and len(self.costars) + len(row) <= max_entries:
+                    self.costars.extend(row.keys())
+                    self.witnesses.extend(row.values())
+                    self.stored[p] = 1
+            self.offsets.append(len(self.costars))
+
+    def compute(self, p):
+        """
+        Returns {co-star index: witness movie index} for person index p,
+        from the graph's movie lists.
+        """
+        row = {}
+        for m in self.graph.movies_of(p):
+            for q in self.graph.stars_of(m):
+                if q != p and q not in row:
+                    row[q] = m
+        return row
+
+    def neighbors(self, p):
+        """
+        Returns parallel sequences (co-stars, witness movies) of person index p.
+        """
+        if self.stored[p]:
+            start, end = self.offsets[p], self.offsets[p + 1]
+            return self.costars[start:end], self.witnesses[start:end]
+
+        cache = self.cache
+        with self.lock:
+            if p in cache:
+                cache.move_to_end(p)
+                return cache[p]
+        row = self.compute(p)
+        entry = (array("i", row.keys()), array("i", row.values()))
+        with self.lock:
+            cache[p] = entry
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return entry
+
+    def expand_level(self, frontier, parent_person, parent_movie, other_parent):
+        """
+        Does what CompactGraph.expand_level does, reading the co-star lists
+        instead of every cast of every movie.
+        """
+        next_frontier = []
+        for p in frontier:
+            costars, witnesses = self.neighbors(p)
+            for q, m in zip(costars, witnesses):
+                if parent_person[q] != -1:
+                    continue
+                parent_person[q] = p
+                parent_movie[q] = m
+                if other_parent[q] != -1:
+                    return next_frontier, q
+                next_frontier.append(q)
+        return next_frontier, None
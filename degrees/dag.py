@@ -0,0 +1,85 @@
+"""
+Predecessor DAG of every shortest path between two people.
+"""
+
+
+class PathDAG():
+    """
+    Every shortest path from `source` to `target`, stored as predecessor
+    lists: `preds[person]` holds the (movie, person) steps that reach it
+    from one degree closer to the source. Only people on some shortest
+    path are kept.
+
+    People and movies may be ids or graph indices; `label(movie, person)`
+    turns a step into the (movie_id, person_id) pair of a path.
+    """
+
+    def __init__(self, source, target, preds, label=None):
+        self.source = source
+        self.target = target
+        self.preds = preds
+        self.label = label or (lambda movie, person: (movie, person))
+
+    @classmethod
+    def search(cls, source, target, neighbors, label=None):
+        """
+        Builds the DAG with one level-synchronous BFS from source, where
+        `neighbors(person)` yields (movie, person) pairs. Returns None if
+        source and target are not connected.
+        """
+        depth = {source: 0}
+        preds = {}
+        frontier = [source]
+        level = 0
+        # Finish the level that reaches the target, so all its steps are seen
+        while frontier and target not in depth:
+            level += 1
+            next_frontier = []
+            for p in frontier:
+                for m, q in neighbors(p):
+                    if q not in depth:
+                        depth[q] = level
+                        next_frontier.append(q)
+                    if depth[q] == level:
+                        preds.setdefault(q, []).append((m, p))
+            frontier = next_frontier
+        if target not in depth:
+            return None
+
+        # Keep only the steps of paths ending at the target
+        kept = {}
+        stack = [target]
+        while stack:
+            q = stack.pop()
+            if q == source or q in kept:
+                continue
+            kept[q] = preds[q]
+            stack.extend(p for _, p in preds[q])
+        return cls(source, target, kept, label)
+
+    def count(self):
+        """
+        Returns the number of shortest paths.
+        """
+        ways = {self.source: 1}
+
+        def count_to(q):
+            if q not in ways:
+                ways[q] = sum(count_to(p) for _, p in self.preds[q])
+            return ways[q]
+
+        return count_to(self.target)
+
+    def paths(self):
+        """
+        Yields every shortest path as a list of (movie_id, person_id) pairs.
+        """
+        def paths_to(q):
+            if q == self.source:
+                yield []
+                return
+            for m, p in self.preds[q]:
+                for path in paths_to(p):
+                    yield path + [self.label(m, q)]
+
+        return paths_to(self.target)
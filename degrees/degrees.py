@@ -1,8 +1,21 @@
 import csv
+import multiprocessing
+import os
 import sys
-
+from collections import Counter
+from itertools import islice
+
+from costars import CoStarIndex
+from dag import PathDAG
+from landmarks import LANDMARK_FILE, LandmarkIndex
+from lookup import NameLookup
+from snapshot import load_snapshot, write_snapshot
+from stream import stream_load
 from util import Node, StackFrontier, QueueFrontier
 
+# Name of the binary snapshot kept next to the CSV files
+SNAPSHOT_FILE = "degrees.snapshot"
+
 # Maps names to a set of corresponding person_ids
 names = {}
 
@@ -12,11 +25,89 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer-indexed graph used instead of the "movies" and "stars" sets
+# when data is loaded with compact=True
+graph = None
+
+
+# Landmark distance index guiding shortest_path, when loaded
+landmark_index = None
+
+# Prefix and fuzzy index over `names`, built on first use
+lookup = None
+
 
-def load_data(directory):
+def load_data(directory, compact=False, snapshot=False, landmarks=False, costars=False,
+              years=None, min_cast=None):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the CSV files are streamed into a CompactGraph and the
+    "movies"/"stars" sets are left out of `people` and `movies`. Returns a
+    Counter of the rows dropped while loading, by reason.
+
+    With `years`, only movies released in that inclusive (first, last)
+    range are loaded, and with `min_cast`, only movies with at least that
+    many stars. Either filter implies `compact` and also drops people left
+    without movies.
+
+    With `snapshot`, the compact data is mapped from a binary snapshot in
+    `directory` instead, and `names`, `people` and `movies` become read-only
+    mappings over it. The snapshot is built from the CSV files when it is
+    missing or they or the filters have changed since.
+
+    With `landmarks`, the data is loaded compactly along with the landmark
+    index saved in `directory` by landmarks.py, if it is up to date.
+
+    With `costars`, the data is loaded compactly and a CoStarIndex is
+    built for searches to expand through.
+    """
+    global graph, names, people, movies, landmark_index, lookup
+
+    lookup = None
+
+    # Start from empty dicts, replacing any read-only snapshot mappings and
+    # rows of an earlier load that a filtered reload would leave out
+    names, people, movies = {}, {}, {}
+    filters = {"years": years and list(years), "min_cast": min_cast}
+    compact = compact or snapshot or landmarks or costars or any(filters.values())
+    skipped = Counter()
+
+    mapped = None
+    if snapshot:
+        path = os.path.join(directory, SNAPSHOT_FILE)
+        mapped = load_snapshot(path, directory, filters)
+    if mapped is not None:
+        graph, names, people, movies = mapped
+    elif compact:
+        graph, skipped = stream_load(directory, names, people, movies, years, min_cast)
+        if snapshot:
+            try:
+                write_snapshot(path, directory, graph, people, movies, filters)
+            except OSError:
+                # A read-only data directory is still loaded, only without a snapshot
+                pass
+    else:
+        load_csv(directory)
+
+    if costars:
+        graph.costars = CoStarIndex(graph)
+
+    landmark_index = None
+    if landmarks:
+        path = os.path.join(directory, LANDMARK_FILE)
+        landmark_index = LandmarkIndex.load(path, graph, directory)
+
+    return skipped
+
+
+def load_csv(directory):
+    """
+    Load data from CSV files into `names`, `people` and `movies`.
     """
+    global graph
+    graph = None
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -52,15 +143,44 @@ def load_data(directory):
                 pass
 
 
+def parse_args(argv):
+    """
+    Returns (directory, load_data keyword arguments) from command-line
+    arguments, exiting with a usage message if they are malformed.
+    """
+    usage = ("Usage: python degrees.py [--compact] [--snapshot] [--landmarks] [--costars]\n"
+             "                          [--years=FIRST-LAST] [--min-cast=N] [directory]")
+    options = {}
+    args = []
+    try:
+        for arg in argv:
+            if arg.startswith("--years="):
+                first, last = arg[len("--years="):].split("-")
+                options["years"] = (int(first), int(last))
+            elif arg.startswith("--min-cast="):
+                options["min_cast"] = int(arg[len("--min-cast="):])
+            elif arg in ("--compact", "--snapshot", "--landmarks", "--costars"):
+                options[arg[2:]] = True
+            elif arg.startswith("--"):
+                sys.exit(usage)
+            else:
+                args.append(arg)
+    except ValueError:
+        sys.exit(usage)
+    if len(args) > 1:
+        sys.exit(usage)
+    return (args[0] if args else "small"), options
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "small"
+    directory, options = parse_args(sys.argv[1:])
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    skipped = load_data(directory, **options)
     print("Data loaded.")
+    for reason, count in sorted(skipped.items()):
+        print(f"Skipped {count} {reason}.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -84,13 +204,24 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    With `bidirectional`, searches from both ends instead of only
+    from the source.
+
     If no possible path, returns None.
     """
+    if graph is not None:
+        if bidirectional:
+            return graph.bidirectional_shortest_path(source, target)
+        if landmark_index is not None:
+            return landmark_index.shortest_path(graph, source, target)
+        return graph.shortest_path(source, target)
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
 
     if source == target:
         return []
@@ -98,7 +229,7 @@ def shortest_path(source, target):
     frontier = QueueFrontier()
     frontier.add(Node(source, None, None))
 
-    visited = [source, ]
+    visited = {source}
     goal = None
 
     while not frontier.empty():
@@ -116,7 +247,7 @@ def shortest_path(source, target):
                 continue
 
             frontier.add(Node(neighbor[1], curr, neighbor))
-            visited.append(neighbor[1])
+            visited.add(neighbor[1])
 
     if goal is not None:
         answer = []
@@ -129,15 +260,187 @@ def shortest_path(source, target):
     return None
 
 
-def person_id_for_name(name):
+def expand_level(frontier, parents, other_parents):
+    """
+    Expands every person in `frontier` by one degree, recording
+    person_id -> (movie_id, person_id it was reached from) in `parents`.
+
+    Returns (next_frontier, meet) where meet is the first person
+    already reached by the other search, or None.
+    """
+    next_frontier = []
+    for person_id in frontier:
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in parents:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            if neighbor in other_parents:
+                return next_frontier, neighbor
+            next_frontier.append(neighbor)
+    return next_frontier, None
+
+
+def path_to(parents, person_id):
+    """
+    Returns the list of (movie_id, person_id) pairs leading from the
+    root of a search to `person_id`, given the search's `parents`.
+    """
+    answer = []
+    while parents[person_id] is not None:
+        movie_id, prev = parents[person_id]
+        answer.append((movie_id, person_id))
+        person_id = prev
+    answer.reverse()
+    return answer
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, searching from both ends and
+    always expanding the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    meet = None
+
+    while forward_frontier and backward_frontier:
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meet = expand_level(forward_frontier, forward, backward)
+        else:
+            backward_frontier, meet = expand_level(backward_frontier, backward, forward)
+        if meet is not None:
+            break
+    if meet is None:
+        return None
+
+    answer = path_to(forward, meet)
+
+    # Target half: each step names the next person toward the target
+    person_id = meet
+    while backward[person_id] is not None:
+        movie_id, person_id = backward[person_id]
+        answer.append((movie_id, person_id))
+    return answer
+
+
+def paths_from(source, targets):
+    """
+    Returns {target: shortest path from source} for every target,
+    from a single search that stops once all targets are reached.
+    """
+    if graph is not None:
+        return graph.paths_from(source, targets)
+
+    parents = {source: None}
+    unreached = set(targets)
+    frontier = [source]
+    while frontier:
+        unreached = {target for target in unreached if target not in parents}
+        if not unreached:
+            break
+        frontier, _ = expand_level(frontier, parents, {})
+
+    return {
+        target: path_to(parents, target) if target in parents else None
+        for target in targets
+    }
+
+
+def paths_from_group(group):
+    """
+    Returns paths_from(source, targets) for a (source, targets) group.
+    """
+    source, targets = group
+    return paths_from(source, targets)
+
+
+def shortest_paths(pairs, processes=None):
+    """
+    Returns a list of shortest_path(source, target) for each pair,
+    running one search per distinct source.
+
+    With `processes`, the searches are spread over that many worker
+    processes. Workers are forked after the data is loaded and share
+    it read-only, so this needs a platform with the "fork" start method.
+    """
+    groups = {}
+    for source, target in pairs:
+        groups.setdefault(source, set()).add(target)
+    groups = list(groups.items())
+
+    if processes:
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            results = pool.map(paths_from_group, groups)
+    else:
+        results = map(paths_from_group, groups)
+
+    answers = {source: paths for (source, _), paths in zip(groups, results)}
+    return [answers[source][target] for source, target in pairs]
+
+
+def shortest_path_dag(source, target):
+    """
+    Returns a PathDAG of every shortest path connecting the source
+    to the target, from a single search, or None if they are not connected.
+    """
+    if graph is not None:
+        return PathDAG.search(
+            graph.person_index[source], graph.person_index[target],
+            graph.steps_from, graph.label
+        )
+    return PathDAG.search(source, target, neighbors_for_person)
+
+
+def all_shortest_paths(source, target, k=None):
+    """
+    Returns every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, or only the first k of them.
+
+    If no possible path, returns an empty list.
+    """
+    dag = shortest_path_dag(source, target)
+    if dag is None:
+        return []
+    return list(islice(dag.paths(), k))
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    source and target from the landmark index, without searching.
+    upper is None if no landmark reaches both people.
+
+    Returns None if they are known to be unconnected, and (0, None)
+    if no landmark index is loaded.
+    """
+    if landmark_index is None:
+        return 0, None
+    return landmark_index.bounds(graph.person_index[source], graph.person_index[target])
+
+
+def person_id_for_name(name, birth=None, prompt=True):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    With `birth`, only people born that year match. If several people
+    still match, asks which one was intended, or returns None if not
+    `prompt`.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name, birth)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
+        if not prompt:
+            return None
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -155,11 +458,47 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_ids_for_name(name, birth=None):
+    """
+    Returns the sorted IMDB ids of everyone with a given name,
+    born in `birth` if given.
+    """
+    person_ids = sorted(names.get(name.lower(), set()))
+    if birth is not None:
+        person_ids = [
+            person_id for person_id in person_ids
+            if people[person_id]["birth"] == str(birth)
+        ]
+    return person_ids
+
+
+def name_lookup():
+    """
+    Returns the NameLookup over `names`, building it on first use.
+    """
+    global lookup
+    if lookup is None:
+        lookup = NameLookup(names)
+    return lookup
+
+
+def search_names(query, limit=10, fuzzy=False):
+    """
+    Returns up to `limit` lowercase names from `names` that start with
+    `query`, or with `fuzzy`, that are within a couple of typos of it.
+    """
+    if fuzzy:
+        return name_lookup().fuzzy(query, limit)
+    return name_lookup().prefix(query, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
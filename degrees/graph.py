@@ -0,0 +1,296 @@
+"""
+Compact integer-indexed storage for the people/movies graph.
+"""
+
+from array import array
+
+
+def _csr(n_rows, rows, cols):
+    """
+    Returns (offsets, indices) arrays of a compressed sparse row matrix
+    built from parallel arrays of row and column indices.
+
+    Each row's column indices are sorted and duplicates are dropped.
+    """
+    offsets = array("i", bytes(4 * (n_rows + 1)))
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(n_rows):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array("i", offsets)
+    scattered = array("i", bytes(4 * len(rows)))
+    for row, col in zip(rows, cols):
+        scattered[cursor[row]] = col
+        cursor[row] += 1
+
+    compact_offsets = array("i", [0])
+    indices = array("i")
+    for row in range(n_rows):
+        indices.extend(sorted(set(scattered[offsets[row]:offsets[row + 1]])))
+        compact_offsets.append(len(indices))
+    return compact_offsets, indices
+
+
+class CompactGraph():
+    """
+    Bipartite person-movie graph with IMDB ids interned to dense integers.
+
+    Adjacency is kept in two CSR structures of `array` ints (or memoryviews
+    of a mapped snapshot):
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]` are the movies
+    of person p, and `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`
+    are the stars of movie m.
+    """
+
+    def __init__(self, person_ids, movie_ids, person_offsets, person_movies,
+                 movie_offsets, movie_stars, person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {pid: i for i, pid in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        # Optional CoStarIndex that searches expand through instead
+        self.costars = None
+
+    @classmethod
+    def from_edges(cls, person_ids, movie_ids, edges):
+        """
+        Builds a graph from lists of IMDB ids and an iterable of
+        (person_id, movie_id) pairs. Pairs naming an unknown id are skipped.
+        """
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        rows = array("i")
+        cols = array("i")
+        for person_id, movie_id in edges:
+            p = person_index.get(person_id)
+            m = movie_index.get(movie_id)
+            if p is None or m is None:
+                continue
+            rows.append(p)
+            cols.append(m)
+        return cls.from_indices(list(person_ids), list(movie_ids), rows, cols,
+                                person_index, movie_index)
+
+    @classmethod
+    def from_indices(cls, person_ids, movie_ids, rows, cols,
+                     person_index=None, movie_index=None):
+        """
+        Builds a graph from lists of IMDB ids and parallel arrays of
+        person and movie indices into them, one pair per star credit.
+        """
+        person_offsets, person_movies = _csr(len(person_ids), rows, cols)
+
+        # Transpose from the deduplicated rows so both sides agree
+        rows = array("i")
+        for p in range(len(person_ids)):
+            rows.extend([p] * (person_offsets[p + 1] - person_offsets[p]))
+        movie_offsets, movie_stars = _csr(len(movie_ids), person_movies, rows)
+
+        return cls(person_ids, movie_ids, person_offsets, person_movies,
+                   movie_offsets, movie_stars, person_index, movie_index)
+
+    def movies_of(self, p):
+        """
+        Returns the movie indices of person index p.
+        """
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_of(self, m):
+        """
+        Returns the person indices starring in movie index m.
+        """
+        return self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        movie_ids = self.movie_ids
+        person_ids = self.person_ids
+        neighbors = set()
+        for m in self.movies_of(self.person_index[person_id]):
+            movie_id = movie_ids[m]
+            for q in self.stars_of(m):
+                neighbors.add((movie_id, person_ids[q]))
+        return neighbors
+
+    def steps_from(self, p):
+        """
+        Yields (movie index, person index) pairs for every movie of person
+        index p and everyone starring in it.
+        """
+        for m in self.movies_of(p):
+            for q in self.stars_of(m):
+                yield m, q
+
+    def label(self, m, p):
+        """
+        Returns the (movie_id, person_id) pair for movie and person indices.
+        """
+        return self.movie_ids[m], self.person_ids[p]
+
+    def path_from_parents(self, parent_movie, parent_person, t):
+        """
+        Walks parent arrays back from person index t and returns
+        the list of (movie_id, person_id) pairs leading to it.
+        """
+        answer = []
+        while parent_person[t] != t:
+            answer.append((self.movie_ids[parent_movie[t]], self.person_ids[t]))
+            t = parent_person[t]
+        answer.reverse()
+        return answer
+
+    def expand_level(self, frontier, parent_person, parent_movie, seen_movies, other_parent):
+        """
+        Expands one BFS level of frontier person indices, filling in the
+        parent arrays. Returns (next_frontier, meet) where meet is the first
+        person index also reached by the other search, or None.
+
+        parent_person[p] == -1 marks p unvisited, and a search root is its
+        own parent. Every cast member of a movie is reached at the same depth
+        by whoever expands it first, so each movie is expanded only once.
+        """
+        if self.costars is not None:
+            return self.costars.expand_level(frontier, parent_person, parent_movie, other_parent)
+
+        person_offsets = self.person_offsets
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+
+        next_frontier = []
+        for p in frontier:
+            for i in range(person_offsets[p], person_offsets[p + 1]):
+                m = person_movies[i]
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for j in range(movie_offsets[m], movie_offsets[m + 1]):
+                    q = movie_stars[j]
+                    if parent_person[q] != -1:
+                        continue
+                    parent_person[q] = p
+                    parent_movie[q] = m
+                    if other_parent[q] != -1:
+                        return next_frontier, q
+                    next_frontier.append(q)
+        return next_frontier, None
+
+    def bidirectional_shortest_path(self, source, target):
+        """
+        Returns the same kind of path as shortest_path, searching from
+        both ends and always expanding the smaller frontier.
+        """
+        if source == target:
+            return []
+        s = self.person_index[source]
+        t = self.person_index[target]
+
+        n = len(self.person_ids)
+        forward_person = array("i", [-1]) * n
+        forward_movie = array("i", [-1]) * n
+        backward_person = array("i", [-1]) * n
+        backward_movie = array("i", [-1]) * n
+        forward_seen = bytearray(len(self.movie_ids))
+        backward_seen = bytearray(len(self.movie_ids))
+        forward_person[s] = s
+        backward_person[t] = t
+
+        forward_frontier = [s]
+        backward_frontier = [t]
+        meet = None
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet = self.expand_level(
+                    forward_frontier, forward_person, forward_movie,
+                    forward_seen, backward_person
+                )
+            else:
+                backward_frontier, meet = self.expand_level(
+                    backward_frontier, backward_person, backward_movie,
+                    backward_seen, forward_person
+                )
+            if meet is not None:
+                break
+        if meet is None:
+            return None
+
+        answer = self.path_from_parents(forward_movie, forward_person, meet)
+        p = meet
+        while backward_person[p] != p:
+            answer.append((self.movie_ids[backward_movie[p]],
+                           self.person_ids[backward_person[p]]))
+            p = backward_person[p]
+        return answer
+
+    def paths_from(self, source, targets):
+        """
+        Returns {target: shortest path from source} for every target,
+        from a single search that stops once all targets are reached.
+        """
+        s = self.person_index[source]
+        n = len(self.person_ids)
+        parent_person = array("i", [-1]) * n
+        parent_movie = array("i", [-1]) * n
+        seen_movies = bytearray(len(self.movie_ids))
+        parent_person[s] = s
+        # No other search to meet, so the search only ends on its own
+        never = array("i", [-1]) * n
+
+        unreached = {self.person_index[target] for target in targets}
+        frontier = [s]
+        while frontier:
+            unreached = {t for t in unreached if parent_person[t] == -1}
+            if not unreached:
+                break
+            frontier, _ = self.expand_level(
+                frontier, parent_person, parent_movie, seen_movies, never
+            )
+
+        paths = {}
+        for target in targets:
+            t = self.person_index[target]
+            if parent_person[t] == -1:
+                paths[target] = None
+            else:
+                paths[target] = self.path_from_parents(parent_movie, parent_person, t)
+        return paths
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+        """
+        if source == target:
+            return []
+        s = self.person_index[source]
+        t = self.person_index[target]
+
+        n = len(self.person_ids)
+        parent_person = array("i", [-1]) * n
+        parent_movie = array("i", [-1]) * n
+        seen_movies = bytearray(len(self.movie_ids))
+        parent_person[s] = s
+        # The target is the only person "reached by the other search"
+        goal = array("i", [-1]) * n
+        goal[t] = t
+
+        frontier = [s]
+        while frontier:
+            frontier, meet = self.expand_level(
+                frontier, parent_person, parent_movie, seen_movies, goal
+            )
+            if meet is not None:
+                return self.path_from_parents(parent_movie, parent_person, t)
+        return None
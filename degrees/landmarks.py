@@ -0,0 +1,219 @@
+"""
+Landmark (ALT) distance index for degrees lookups.
+
+For a few well-connected landmark people, the index stores the degrees of
+separation from each landmark to every person. By the triangle inequality,
+|d(L, u) - d(L, t)| is a lower bound on d(u, t), which lets shortest_path
+run as an A* search, and d(s, L) + d(L, t) is an upper bound on d(s, t).
+
+Usage: python landmarks.py directory [k]
+"""
+
+import heapq
+import json
+import os
+import sys
+from array import array
+
+from snapshot import source_stats
+
+MAGIC = b"DEGLMK1\n"
+
+# Name of the index file kept next to the CSV files
+LANDMARK_FILE = "degrees.landmarks"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 0xFFFF
+
+
+def distances_from(graph, s):
+    """
+    Returns an array of the degrees of separation from person index s
+    to every person index of `graph`.
+    """
+    n = len(graph.person_ids)
+    distances = array("H", [UNREACHABLE]) * n
+    parent_person = array("i", [-1]) * n
+    parent_movie = array("i", [-1]) * n
+    seen_movies = bytearray(len(graph.movie_ids))
+    never = array("i", [-1]) * n
+    parent_person[s] = s
+    distances[s] = 0
+
+    frontier = [s]
+    depth = 0
+    while frontier:
+        frontier, _ = graph.expand_level(
+            frontier, parent_person, parent_movie, seen_movies, never
+        )
+        depth += 1
+        for p in frontier:
+            distances[p] = depth
+    return distances
+
+
+class LandmarkIndex():
+    """
+    Distances from landmark person indices to every person index.
+    `distances[i][p]` is the distance from `landmarks[i]` to p.
+    """
+
+    def __init__(self, landmarks, distances):
+        self.landmarks = landmarks
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Builds an index over the k people with the most co-star credits.
+        """
+        def credits(p):
+            return sum(len(graph.stars_of(m)) for m in graph.movies_of(p))
+
+        landmarks = sorted(range(len(graph.person_ids)), key=credits, reverse=True)[:k]
+        return cls(landmarks, [distances_from(graph, p) for p in landmarks])
+
+    def save(self, path, graph, directory):
+        """
+        Writes the index to `path`, stamped with the CSV file stats of
+        `directory` it was built from.
+        """
+        header = {
+            "byteorder": sys.byteorder,
+            "sources": source_stats(directory),
+            "people": len(graph.person_ids),
+            "landmarks": [graph.person_ids[p] for p in self.landmarks],
+        }
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            for distances in self.distances:
+                distances.tofile(f)
+
+    @classmethod
+    def load(cls, path, graph, directory):
+        """
+        Reads an index from `path`, or returns None if it is missing or
+        was not built from the CSV files in `directory`.
+        """
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            if f.readline() != MAGIC:
+                return None
+            header = json.loads(f.readline())
+            if (header["byteorder"] != sys.byteorder
+                    or header["sources"] != source_stats(directory)
+                    or header["people"] != len(graph.person_ids)):
+                return None
+            landmarks = [graph.person_index[person_id] for person_id in header["landmarks"]]
+            distances = []
+            for _ in landmarks:
+                row = array("H")
+                row.fromfile(f, header["people"])
+                distances.append(row)
+        return cls(landmarks, distances)
+
+    def bounds(self, s, t):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        person indices s and t, or None if they are known to be unconnected.
+        upper is None when no landmark reaches both.
+        """
+        lower = 0
+        upper = None
+        for distances in self.distances:
+            ds, dt = distances[s], distances[t]
+            if (ds == UNREACHABLE) != (dt == UNREACHABLE):
+                return None
+            if ds == UNREACHABLE:
+                continue
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def shortest_path(self, graph, source, target):
+        """
+        Returns a shortest path from source to target in the format of
+        graph.shortest_path, found by an A* search guided by the landmark
+        lower bounds. Among paths of equal length it may pick a different
+        one than the breadth-first search does.
+        """
+        if source == target:
+            return []
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        if self.bounds(s, t) is None:
+            return None
+
+        rows = [(distances, distances[t]) for distances in self.distances]
+
+        def estimate(u):
+            """
+            Returns a lower bound on the degrees from u to t,
+            or None if u cannot reach t.
+            """
+            best = 0
+            for distances, dt in rows:
+                du = distances[u]
+                if (du == UNREACHABLE) != (dt == UNREACHABLE):
+                    return None
+                if du != UNREACHABLE and abs(du - dt) > best:
+                    best = abs(du - dt)
+            return best
+
+        n = len(graph.person_ids)
+        cost = array("i", [-1]) * n
+        parent_person = array("i", [-1]) * n
+        parent_movie = array("i", [-1]) * n
+        closed = bytearray(n)
+        cost[s] = 0
+        parent_person[s] = s
+
+        # Entries are (estimated total, -cost, person), so ties go deepest first
+        queue = [(estimate(s), 0, s)]
+        while queue:
+            _, _, p = heapq.heappop(queue)
+            if closed[p]:
+                continue
+            closed[p] = 1
+            if p == t:
+                return graph.path_from_parents(parent_movie, parent_person, t)
+
+            g = cost[p] + 1
+            for m in graph.movies_of(p):
+                for q in graph.stars_of(m):
+                    if closed[q] or cost[q] != -1 and cost[q] <= g:
+                        continue
+                    h = estimate(q)
+                    if h is None:
+                        continue
+                    cost[q] = g
+                    parent_person[q] = p
+                    parent_movie[q] = m
+                    heapq.heappush(queue, (g + h, -g, q))
+        return None
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python landmarks.py directory [k]")
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    # Imported here since degrees itself loads saved indexes from this module
+    import degrees
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    print(f"Building index over {k} landmarks...")
+    index = LandmarkIndex.build(degrees.graph, k)
+    index.save(os.path.join(directory, LANDMARK_FILE), degrees.graph, directory)
+    print("Index saved.")
+
+
+if __name__ == "__main__":
+    main()
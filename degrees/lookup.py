@@ -0,0 +1,107 @@
+"""
+Prefix and typo-tolerant lookup over lowercase names.
+"""
+
+from array import array
+from bisect import bisect_left
+
+
+def trigrams(name):
+    """
+    Returns the set of 3-character substrings of `name`, padded so that
+    its start and end count too.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between strings a and b,
+    or limit + 1 if it is more than `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class NameLookup():
+    """
+    Index over the keys of a {lowercase name: person ids} mapping.
+
+    Prefix queries binary-search the sorted keys, and fuzzy queries take
+    candidates from a trigram index before checking their edit distance.
+    Queries too short for the trigrams to rule a name out check every
+    name of similar length instead.
+    """
+
+    def __init__(self, names):
+        self.keys = sorted(names)
+        self.grams = {}
+        self.lengths = {}
+        for i, key in enumerate(self.keys):
+            lengths = self.lengths.get(len(key))
+            if lengths is None:
+                lengths = self.lengths[len(key)] = array("i")
+            lengths.append(i)
+            for gram in trigrams(key):
+                postings = self.grams.get(gram)
+                if postings is None:
+                    postings = self.grams[gram] = array("i")
+                postings.append(i)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in sorted order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(matches) < limit and self.keys[i].startswith(prefix):
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, name, limit=10, max_distance=2):
+        """
+        Returns up to `limit` names within `max_distance` edits of `name`,
+        closest first.
+        """
+        name = name.lower()
+        grams = trigrams(name)
+
+        # Each edit changes at most 3 trigrams, so a name within reach
+        # shares at least this many with the query
+        needed = len(grams) - 3 * max_distance
+        if needed < 1:
+            candidates = [
+                i
+                for length in range(len(name) - max_distance, len(name) + max_distance + 1)
+                for i in self.lengths.get(length, ())
+            ]
+        else:
+            hits = {}
+            for gram in grams:
+                for i in self.grams.get(gram, ()):
+                    hits[i] = hits.get(i, 0) + 1
+            candidates = [i for i, count in hits.items() if count >= needed]
+
+        matches = []
+        for i in candidates:
+            distance = edit_distance(name, self.keys[i], max_distance)
+            if distance <= max_distance:
+                matches.append((distance, self.keys[i]))
+        matches.sort()
+        return [key for _, key in matches[:limit]]
@@ -0,0 +1,188 @@
+"""
+Long-running JSON query server for degrees.
+
+Loads the data once and answers concurrent requests over local HTTP:
+
+    GET /path?source=ID&target=ID       shortest path between two person ids
+    GET /person?name=NAME[&birth=YEAR]  people with a given name
+    GET /complete?q=TEXT[&fuzzy=1]      names starting with (or close to) TEXT
+    GET /metrics                        request counts and latency percentiles
+                                        of each endpoint, under "endpoints"
+
+Usage: python server.py [--port=N] [degrees.py options] [directory]
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+PORT = 8050
+
+# Number of recent latencies per endpoint kept for percentiles
+WINDOW = 10_000
+
+
+class PathCache():
+    """
+    Thread-safe LRU cache of shortest_path results keyed on (source, target).
+    """
+
+    def __init__(self, size=100_000):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns (True, path) for a cached key, or (False, None).
+        """
+        with self.lock:
+            if key not in self.entries:
+                return False, None
+            self.entries.move_to_end(key)
+            return True, self.entries[key]
+
+    def put(self, key, path):
+        with self.lock:
+            self.entries[key] = path
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class Metrics():
+    """
+    Thread-safe request counts and recent latencies per endpoint.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.latencies = {}
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            self.latencies.setdefault(endpoint, deque(maxlen=WINDOW)).append(seconds)
+
+    def report(self):
+        """
+        Returns {endpoint: {"count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}.
+        """
+        with self.lock:
+            snapshot = {endpoint: sorted(values) for endpoint, values in self.latencies.items()}
+            counts = dict(self.counts)
+        report = {}
+        for endpoint, values in snapshot.items():
+            report[endpoint] = {"count": counts[endpoint]}
+            for name, q in (("p50_ms", 0.5), ("p95_ms", 0.95), ("p99_ms", 0.99), ("max_ms", 1)):
+                report[endpoint][name] = values[min(len(values) - 1, int(q * len(values)))] * 1000
+        return report
+
+
+cache = PathCache()
+metrics = Metrics()
+
+
+def find_path(source, target):
+    """
+    Returns the response for a /path request.
+    """
+    if source not in degrees.people or target not in degrees.people:
+        return 404, {"error": "unknown person id"}
+    hit, path = cache.get((source, target))
+    if not hit:
+        path = degrees.shortest_path(source, target)
+        cache.put((source, target), path)
+    return 200, {
+        "path": path,
+        "degrees": None if path is None else len(path),
+        "cached": hit,
+    }
+
+
+def find_person(name, birth=None):
+    """
+    Returns the response for a /person request.
+    """
+    person_ids = degrees.person_ids_for_name(name, birth)
+    return 200, {
+        "people": [
+            {
+                "id": person_id,
+                "name": degrees.people[person_id]["name"],
+                "birth": degrees.people[person_id]["birth"],
+            }
+            for person_id in person_ids
+        ]
+    }
+
+
+def complete(query, fuzzy):
+    """
+    Returns the response for a /complete request.
+    """
+    return 200, {"names": degrees.search_names(query, fuzzy=fuzzy)}
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/path" and {"source", "target"} <= query.keys():
+                status, body = find_path(query["source"], query["target"])
+            elif url.path == "/person" and "name" in query:
+                status, body = find_person(query["name"], query.get("birth"))
+            elif url.path == "/complete" and "q" in query:
+                status, body = complete(query["q"], query.get("fuzzy") == "1")
+            elif url.path == "/metrics":
+                status, body = 200, {"endpoints": metrics.report()}
+            else:
+                status, body = 400, {"error": "unknown endpoint or missing parameters"}
+        except Exception as e:
+            status, body = 500, {"error": str(e)}
+
+        elapsed = time.perf_counter() - start
+        body["ms"] = elapsed * 1000
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        metrics.record(url.path if status != 400 else "invalid", elapsed)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--port=")]
+    port = PORT
+    for arg in sys.argv[1:]:
+        if arg.startswith("--port="):
+            port = int(arg[len("--port="):])
+    directory, options = degrees.parse_args(args)
+
+    print("Loading data...")
+    degrees.load_data(directory, **options)
+    print("Data loaded.")
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Serving on http://127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Memory-mapped binary snapshots of the compact degrees data.
+
+A snapshot holds the CSR adjacency arrays of a CompactGraph together with
+the interned id, name, birth, title and year tables, so that later runs can
+map it instead of parsing the CSV files again. It records the mtime and size
+of each CSV file it was built from, and the load filters, and is ignored
+once any of them change.
+
+Layout: an 8 byte magic, the offset and length of a JSON header (two
+little-endian int64s), then 8-byte aligned sections in native byte order.
+The header lists each section's offset, byte length and array typecode.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+
+from graph import CompactGraph
+
+MAGIC = b"DEGSNAP1"
+PRELUDE = struct.Struct("<8sqq")
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+
+def source_stats(directory):
+    """
+    Returns {filename: [mtime_ns, size]} for the CSV files in `directory`.
+    """
+    stats = {}
+    for filename in SOURCES:
+        st = os.stat(os.path.join(directory, filename))
+        stats[filename] = [st.st_mtime_ns, st.st_size]
+    return stats
+
+
+def encode_strings(strings):
+    """
+    Returns (offsets, data) for a StringTable holding `strings`.
+    """
+    offsets = array("q", [0])
+    data = bytearray()
+    for string in strings:
+        data += string.encode("utf-8")
+        offsets.append(len(data))
+    return offsets, data
+
+
+class StringTable(Sequence):
+    """
+    Sequence of strings stored as utf-8 bytes, where string i is
+    data[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class SortedIndex(Mapping):
+    """
+    Read-only mapping from key(i) to the positions i holding it, found by
+    binary search over `order`, the positions sorted by key.
+    """
+
+    def __init__(self, order, key):
+        self.order = order
+        self.key = key
+
+    def positions(self, value):
+        order = self.order
+        i = bisect_left(order, value, key=self.key)
+        while i < len(order) and self.key(order[i]) == value:
+            yield order[i]
+            i += 1
+
+    def __getitem__(self, value):
+        for position in self.positions(value):
+            return position
+        raise KeyError(value)
+
+    def __iter__(self):
+        previous = None
+        for i in self.order:
+            value = self.key(i)
+            if value != previous:
+                yield value
+            previous = value
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class NameIndex(SortedIndex):
+    """
+    Maps lowercase names to the set of person ids with that name,
+    like `degrees.names`.
+    """
+
+    def __init__(self, order, person_names, person_ids):
+        super().__init__(order, lambda i: person_names[i].lower())
+        self.person_ids = person_ids
+
+    def __getitem__(self, name):
+        person_ids = {self.person_ids[i] for i in self.positions(name)}
+        if not person_ids:
+            raise KeyError(name)
+        return person_ids
+
+
+class Records(Mapping):
+    """
+    Maps ids to dicts of string fields, like `degrees.people`
+    and `degrees.movies`.
+    """
+
+    def __init__(self, index, fields):
+        self.index = index
+        self.fields = fields
+
+    def __getitem__(self, record_id):
+        i = self.index[record_id]
+        return {field: table[i] for field, table in self.fields.items()}
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index.order)
+
+
+def write_snapshot(path, directory, graph, people, movies, filters=None):
+    """
+    Writes a snapshot of `graph` and the `people`/`movies` dicts it was
+    built from to `path`, stamped with the CSV file stats of `directory`
+    and the load `filters` used.
+    """
+    person_ids = graph.person_ids
+    movie_ids = graph.movie_ids
+    person_names = [people[person_id]["name"] for person_id in person_ids]
+
+    sections = [
+        ("person_offsets", graph.person_offsets),
+        ("person_movies", graph.person_movies),
+        ("movie_offsets", graph.movie_offsets),
+        ("movie_stars", graph.movie_stars),
+        ("person_order", array("i", sorted(range(len(person_ids)), key=person_ids.__getitem__))),
+        ("name_order", array("i", sorted(range(len(person_ids)),
+                                         key=lambda i: person_names[i].lower()))),
+        ("movie_order", array("i", sorted(range(len(movie_ids)), key=movie_ids.__getitem__))),
+    ]
+    tables = [
+        ("person_id", person_ids),
+        ("name", person_names),
+        ("birth", [people[person_id]["birth"] for person_id in person_ids]),
+        ("movie_id", movie_ids),
+        ("title", [movies[movie_id]["title"] for movie_id in movie_ids]),
+        ("year", [movies[movie_id]["year"] for movie_id in movie_ids]),
+    ]
+    for name, strings in tables:
+        offsets, data = encode_strings(strings)
+        sections.append((f"{name}_offsets", offsets))
+        sections.append((f"{name}_data", array("B", data)))
+
+    header = {
+        "byteorder": sys.byteorder,
+        "sources": source_stats(directory),
+        "filters": filters,
+        "sections": {},
+    }
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(bytes(PRELUDE.size))
+            for name, values in sections:
+                f.write(bytes(-f.tell() % 8))
+                header["sections"][name] = [f.tell(), len(values) * values.itemsize, values.typecode]
+                values.tofile(f)
+            header_offset = f.tell()
+            encoded = json.dumps(header).encode("utf-8")
+            f.write(encoded)
+            f.seek(0)
+            f.write(PRELUDE.pack(MAGIC, header_offset, len(encoded)))
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Leave no partial snapshot behind
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_snapshot(path, directory, filters=None):
+    """
+    Maps the snapshot at `path` and returns (graph, names, people, movies),
+    or None if it is missing, damaged or does not match the CSV files in
+    `directory` and the load `filters`.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if len(buffer) < PRELUDE.size:
+        return None
+    magic, header_offset, header_length = PRELUDE.unpack(buffer[:PRELUDE.size])
+    if magic != MAGIC:
+        return None
+
+    # A damaged header or section table is treated as no snapshot
+    try:
+        header = json.loads(bytes(buffer[header_offset:header_offset + header_length]))
+        if (header["byteorder"] != sys.byteorder
+                or header["sources"] != source_stats(directory)
+                or header.get("filters") != filters):
+            return None
+
+        s = {}
+        for name, (offset, length, typecode) in header["sections"].items():
+            if not 0 <= offset <= offset + length <= len(buffer):
+                return None
+            s[name] = buffer[offset:offset + length].cast(typecode)
+        tables = {
+            name: StringTable(s[f"{name}_offsets"], s[f"{name}_data"])
+            for name in ("person_id", "name", "birth", "movie_id", "title", "year")
+        }
+        for name in ("person_offsets", "person_movies", "movie_offsets", "movie_stars",
+                     "person_order", "name_order", "movie_order"):
+            if name not in s:
+                return None
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+    person_ids = tables["person_id"]
+    movie_ids = tables["movie_id"]
+    person_index = SortedIndex(s["person_order"], person_ids.__getitem__)
+    movie_index = SortedIndex(s["movie_order"], movie_ids.__getitem__)
+
+    graph = CompactGraph(
+        person_ids, movie_ids,
+        s["person_offsets"], s["person_movies"],
+        s["movie_offsets"], s["movie_stars"],
+        person_index, movie_index
+    )
+    names = NameIndex(s["name_order"], tables["name"], person_ids)
+    people = Records(person_index, {"name": tables["name"], "birth": tables["birth"]})
+    movies = Records(movie_index, {"title": tables["title"], "year": tables["year"]})
+    return graph, names, people, movies
@@ -0,0 +1,167 @@
+"""
+Streaming CSV loader for the compact degrees graph.
+
+The CSV files are read in chunks of plain rows and only the final tables
+are kept: movies first (so the year filter applies before any credits are
+stored), then star credits as two int arrays, then only the people who are
+needed. Rows that are dropped are counted by reason instead of silently.
+"""
+
+import csv
+import itertools
+from array import array
+from collections import Counter
+
+from graph import CompactGraph
+
+CHUNK_SIZE = 100_000
+
+
+def read_chunks(path, fields, chunk_size=CHUNK_SIZE):
+    """
+    Yields lists of up to `chunk_size` tuples holding the given `fields`
+    of each row of the CSV file at `path`.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = [header.index(field) for field in fields]
+        while True:
+            chunk = [tuple(row[i] for i in columns)
+                     for row in itertools.islice(reader, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+
+def in_years(year, years):
+    """
+    Returns True if the `year` string falls within the inclusive
+    (first, last) range `years`.
+    """
+    try:
+        return years[0] <= int(year) <= years[1]
+    except ValueError:
+        return False
+
+
+def stream_load(directory, names, people, movies, years=None, min_cast=None,
+                chunk_size=CHUNK_SIZE):
+    """
+    Loads the CSV files in `directory` into the `names`, `people` and
+    `movies` dicts (without "movies"/"stars" sets) and returns
+    (graph, skipped), where `skipped` counts dropped rows by reason.
+
+    With `years`, only movies released in that inclusive (first, last)
+    range are kept. With `min_cast`, only movies with at least that many
+    rows in stars.csv are kept. When either filter is given, people left
+    without any movie are dropped too.
+    """
+    filtering = years is not None or min_cast is not None
+    skipped = Counter()
+
+    # Load movies
+    movie_ids = []
+    movie_index = {}
+    for chunk in read_chunks(f"{directory}/movies.csv", ("id", "title", "year"), chunk_size):
+        for movie_id, title, year in chunk:
+            if years is not None and not in_years(year, years):
+                skipped["movies outside years"] += 1
+                continue
+            if movie_id in movie_index:
+                skipped["duplicate movies"] += 1
+                continue
+            movie_index[movie_id] = len(movie_ids)
+            movie_ids.append(movie_id)
+            movies[movie_id] = {"title": title, "year": year}
+
+    # Load stars, numbering people in order of their first credit for now
+    star_people = {}
+    rows = array("i")
+    cols = array("i")
+    cast_sizes = array("i", [0]) * len(movie_ids)
+    for chunk in read_chunks(f"{directory}/stars.csv", ("person_id", "movie_id"), chunk_size):
+        for person_id, movie_id in chunk:
+            m = movie_index.get(movie_id)
+            if m is None:
+                skipped["stars with unknown or filtered movie"] += 1
+                continue
+            p = star_people.setdefault(person_id, len(star_people))
+            rows.append(p)
+            cols.append(m)
+            cast_sizes[m] += 1
+
+    # Drop small casts before any person records are kept
+    if min_cast is not None:
+        kept = bytearray(cast_sizes[m] >= min_cast for m in range(len(movie_ids)))
+        if sum(kept) < len(movie_ids):
+            skipped["movies below min cast"] += len(movie_ids) - sum(kept)
+        rows, cols, movie_ids, movie_index = drop_movies(rows, cols, movie_ids, kept, movies)
+    del cast_sizes
+
+    credited = bytearray(len(star_people))
+    for p in rows:
+        credited[p] = 1
+
+    # Load people, renumbering credited people in people.csv order
+    person_ids = []
+    person_index = {}
+    renumber = array("i", [-1]) * len(star_people)
+    for chunk in read_chunks(f"{directory}/people.csv", ("id", "name", "birth"), chunk_size):
+        for person_id, name, birth in chunk:
+            if person_id in person_index:
+                skipped["duplicate people"] += 1
+                continue
+            p = star_people.get(person_id)
+            if p is None or not credited[p]:
+                if filtering:
+                    skipped["people without movies"] += 1
+                    continue
+            else:
+                renumber[p] = len(person_ids)
+            person_index[person_id] = len(person_ids)
+            person_ids.append(person_id)
+            people[person_id] = {"name": name, "birth": birth}
+            names.setdefault(name.lower(), set()).add(person_id)
+    del star_people, credited
+
+    # Drop credits of people missing from people.csv
+    kept_rows = array("i")
+    kept_cols = array("i")
+    for p, m in zip(rows, cols):
+        if renumber[p] == -1:
+            skipped["stars with unknown person"] += 1
+            continue
+        kept_rows.append(renumber[p])
+        kept_cols.append(m)
+    del rows, cols, renumber
+
+    graph = CompactGraph.from_indices(
+        person_ids, movie_ids, kept_rows, kept_cols, person_index, movie_index
+    )
+    return graph, skipped
+
+
+def drop_movies(rows, cols, movie_ids, kept, movies):
+    """
+    Removes the movies whose `kept` flag is 0 from `movies` and from the
+    credit arrays, renumbering the rest. Returns the new
+    (rows, cols, movie_ids, movie_index).
+    """
+    renumber = array("i", [-1]) * len(movie_ids)
+    kept_ids = []
+    for m, movie_id in enumerate(movie_ids):
+        if kept[m]:
+            renumber[m] = len(kept_ids)
+            kept_ids.append(movie_id)
+        else:
+            del movies[movie_id]
+
+    kept_rows = array("i")
+    kept_cols = array("i")
+    for p, m in zip(rows, cols):
+        if renumber[m] != -1:
+            kept_rows.append(p)
+            kept_cols.append(renumber[m])
+    movie_index = {movie_id: m for m, movie_id in enumerate(kept_ids)}
+    return kept_rows, kept_cols, kept_ids, movie_index
@@ -0,0 +1,163 @@
+"""
+Level-synchronous BFS over the compact degrees graph with NumPy/SciPy.
+
+Each BFS level is computed for the whole frontier at once from boolean
+person and movie masks, so the inner loop runs in compiled code instead
+of visiting one person at a time. Large frontiers go through sparse
+matrix-vector products with the person x movie incidence matrix; small
+ones just gather the rows of the frontier.
+
+Usage: python vectorized.py directory name degrees
+"""
+
+import sys
+
+import numpy as np
+from scipy import sparse
+
+import degrees
+
+# Frontiers holding less than this share of all credits are expanded by
+# gathering their rows instead of a full matrix-vector product
+GATHER_SHARE = 0.05
+
+
+class SparseBFS():
+    """
+    Boolean incidence matrices of a CompactGraph, sharing its CSR arrays.
+    `person_movie[p, m]` and `movie_person[m, p]` are set when person p
+    stars in movie m.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        n_people = len(graph.person_ids)
+        n_movies = len(graph.movie_ids)
+        person_movies = np.frombuffer(graph.person_movies, dtype=np.int32)
+        movie_stars = np.frombuffer(graph.movie_stars, dtype=np.int32)
+        self.person_movie = sparse.csr_matrix(
+            (np.ones(len(person_movies), dtype=bool), person_movies,
+             np.frombuffer(graph.person_offsets, dtype=np.int32)),
+            shape=(n_people, n_movies)
+        )
+        self.movie_person = sparse.csr_matrix(
+            (np.ones(len(movie_stars), dtype=bool), movie_stars,
+             np.frombuffer(graph.movie_offsets, dtype=np.int32)),
+            shape=(n_movies, n_people)
+        )
+
+    def step(self, forward, backward, rows, mask):
+        """
+        Returns a boolean mask of the columns set in any of the `rows` of
+        `forward`, given as both an index array and a boolean mask.
+        `backward` is the transpose of `forward`.
+        """
+        credits = (forward.indptr[rows + 1] - forward.indptr[rows]).sum()
+        if credits < GATHER_SHARE * forward.nnz:
+            reached = np.zeros(forward.shape[1], dtype=bool)
+            reached[forward[rows].indices] = True
+            return reached
+        return backward @ mask
+
+    def pick(self, matrix, rows, allowed):
+        """
+        Returns, for each of the `rows` of `matrix`, the largest column
+        index set in it whose `allowed` flag is set. Every row must have one.
+        """
+        sub = matrix[rows]
+        candidates = np.where(allowed[sub.indices], sub.indices, -1)
+        return np.maximum.reduceat(candidates, sub.indptr[:-1])
+
+    def search(self, s, t=None, max_depth=None, parents=False):
+        """
+        Runs a BFS from person index s, stopping once person index t is
+        reached or after `max_depth` levels. Returns (depth, parent_person,
+        parent_movie) arrays, with depth -1 for people not reached and the
+        parent arrays None unless `parents`.
+        """
+        n_people, n_movies = self.person_movie.shape
+        depth = np.full(n_people, -1, dtype=np.int32)
+        seen_movies = np.zeros(n_movies, dtype=bool)
+        parent_person = parent_movie = None
+        if parents:
+            parent_person = np.full(n_people, -1, dtype=np.int32)
+            parent_movie = np.full(n_people, -1, dtype=np.int32)
+            parent_person[s] = s
+        depth[s] = 0
+
+        frontier = np.array([s])
+        frontier_mask = depth == 0
+        level = 0
+        while len(frontier) and (t is None or depth[t] == -1) \
+                and (max_depth is None or level < max_depth):
+            level += 1
+
+            # Movies of the frontier that no earlier level expanded
+            movie_mask = self.step(self.person_movie, self.movie_person, frontier, frontier_mask)
+            movie_mask &= ~seen_movies
+            seen_movies |= movie_mask
+            movies = np.flatnonzero(movie_mask)
+
+            # Everyone starring in those movies who was not reached before
+            frontier_mask = self.step(self.movie_person, self.person_movie, movies, movie_mask)
+            frontier_mask &= depth == -1
+            frontier = np.flatnonzero(frontier_mask)
+            depth[frontier] = level
+
+            if parents and len(frontier):
+                # A previous-level star of each movie, then a new movie of each person
+                movie_parent = np.full(n_movies, -1, dtype=np.int32)
+                movie_parent[movies] = self.pick(self.movie_person, movies, depth == level - 1)
+                parent_movie[frontier] = self.pick(self.person_movie, frontier, movie_mask)
+                parent_person[frontier] = movie_parent[parent_movie[frontier]]
+
+        return depth, parent_person, parent_movie
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None.
+        """
+        graph = self.graph
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        depth, parent_person, parent_movie = self.search(s, t, parents=True)
+        if depth[t] == -1:
+            return None
+        return graph.path_from_parents(parent_movie, parent_person, t)
+
+    def within(self, source, max_degrees):
+        """
+        Returns a list whose item d holds the ids of everyone exactly
+        d degrees from source, for d up to `max_degrees`.
+        """
+        graph = self.graph
+        depth, _, _ = self.search(graph.person_index[source], max_depth=max_degrees)
+        order = np.argsort(depth, kind="stable")
+        counts = np.bincount(depth[depth >= 0], minlength=max_degrees + 1)
+        start = np.count_nonzero(depth < 0)
+        levels = []
+        for count in counts:
+            levels.append([graph.person_ids[p] for p in order[start:start + count]])
+            start += count
+        return levels
+
+
+def main():
+    if len(sys.argv) != 4:
+        sys.exit("Usage: python vectorized.py directory name degrees")
+    directory, name, max_degrees = sys.argv[1], sys.argv[2], int(sys.argv[3])
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True)
+    source = degrees.person_id_for_name(name)
+    if source is None:
+        sys.exit("Person not found.")
+
+    levels = SparseBFS(degrees.graph).within(source, max_degrees)
+    for d, person_ids in enumerate(levels):
+        print(f"{d} degrees: {len(person_ids)} people")
+
+
+if __name__ == "__main__":
+    main()
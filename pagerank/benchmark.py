@@ -0,0 +1,77 @@
+"""
+Benchmarks of the PageRank solvers on the bundled corpora and on
+generated scale-free link graphs.
+
+Usage: python benchmark.py [pages] [links per page]
+"""
+
+import sys
+
+import numpy as np
+
+from matrix import LinkMatrix
+from pagerank import DAMPING, crawl
+from solvers import SOLVERS, solve
+
+CORPORA = ("corpus0", "corpus1", "corpus2")
+
+# Share of generated pages without links
+DANGLING_SHARE = 0.1
+
+# Pages per site of a generated graph, and share of links within a site
+SITE_SIZE = 1000
+LOCALITY = 0.9
+
+
+def scale_free_graph(n, links_per_page, exponent=2.1, locality=0.0, seed=0):
+    """
+    Returns a LinkMatrix of n pages whose in-degrees follow a power law
+    with the given exponent, as on the web. Each link goes from a random
+    page with links to a target drawn with weight i ** (-1 / (exponent - 1)),
+    or, with probability `locality`, to a page on the source's own site
+    of SITE_SIZE consecutive pages.
+    """
+    rng = np.random.default_rng(seed)
+    m = n * links_per_page
+    weights = np.arange(1, n + 1, dtype=float) ** (-1 / (exponent - 1))
+    targets = rng.choice(n, size=m, p=weights / weights.sum())
+
+    # Shuffle page numbers so popular pages are spread over the matrix
+    targets = rng.permutation(n)[targets]
+    sources = rng.integers(int(n * DANGLING_SHARE), n, m)
+
+    # Links within a site keep random walks there for a while, which
+    # slows power iteration down as on real link graphs
+    local = rng.random(m) < locality
+    site = sources[local] - sources[local] % SITE_SIZE
+    targets[local] = np.minimum(site + rng.integers(0, SITE_SIZE, len(site)), n - 1)
+    return LinkMatrix.from_edges(n, sources, targets)
+
+
+def benchmark(name, links):
+    """
+    Runs every solver on a LinkMatrix and prints its stats, with the L1
+    error of its ranks against a tightly converged power iteration.
+    """
+    reference, _ = solve(links, DAMPING, "power", tolerance=1e-14)
+    print(f"{name}: {links.matrix.shape[0]} pages, {links.matrix.nnz} links")
+    for solver in SOLVERS:
+        ranks, stats = solve(links, DAMPING, solver)
+        print(f"  {stats}, error {np.abs(ranks - reference).sum():.2e}")
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [pages] [links per page]")
+    args = [int(arg) for arg in sys.argv[1:]]
+    pages, links_per_page = args + [1_000_000, 10][len(args):]
+
+    for corpus in CORPORA:
+        benchmark(corpus, LinkMatrix.from_corpus(crawl(corpus, cache=False)))
+    for n in sorted({pages // 100, pages // 10, pages}):
+        benchmark(f"scale-free {n}", scale_free_graph(n, links_per_page))
+        benchmark(f"scale-free {n} with sites", scale_free_graph(n, links_per_page, locality=LOCALITY))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Parallel corpus crawler with a link cache.
+
+Pages are parsed across a process pool, reading each file in chunks
+rather than all at once. The links found in each page are saved to a
+cache file in the corpus directory, keyed on the page's mtime and size,
+so later crawls only parse the pages that changed. A corpus that cannot
+be written to is crawled without saving the cache.
+
+Links may be relative to the page ("b.html", "./b.html") or absolute
+paths ("/b.html", "/wiki/b.html"). The corpus is one flat directory, so
+absolute paths are matched by their last path component. Links to
+another host ("http://example.com/b.html") are never corpus pages.
+
+Cache layout: an 8 byte magic and the length of a JSON header (a
+little-endian int64), the header holding [name, mtime_ns, size] of each
+page and the table of link targets, then the offsets (int64) and target
+indices (int32) of each page's links, in native byte order.
+"""
+
+import json
+import multiprocessing
+import os
+import posixpath
+import re
+import struct
+import sys
+from array import array
+from urllib.parse import urlsplit
+
+MAGIC = b"PRLINKS1"
+PRELUDE = struct.Struct("<8sq")
+
+# Name of the cache file kept in the corpus directory
+CACHE_FILE = "pagerank.links"
+
+CHUNK_SIZE = 1 << 16
+
+# Fewer changed pages than this are parsed without a process pool
+POOL_MIN = 256
+
+HREF = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+PLAIN = re.compile(r"[^/:?#.][^/:?#]*")
+
+
+def resolve(href):
+    """
+    Returns the corpus page name an href points to, or None if it
+    cannot be one.
+    """
+    # Most links are plain page names, which need no parsing
+    if PLAIN.fullmatch(href):
+        return href
+    url = urlsplit(href)
+    if url.scheme not in ("", "http", "https") or url.netloc or not url.path:
+        return None
+    if url.scheme or url.path.startswith("/"):
+        return posixpath.basename(url.path) or None
+    path = posixpath.normpath(url.path)
+    return None if path in (".", "..") or path.startswith("../") else path
+
+
+def read_links(path):
+    """
+    Returns the sorted names of the pages linked to by the HTML file at
+    `path`, reading it in chunks.
+    """
+    links = set()
+    carry = ""
+    with open(path) as f:
+        while chunk := f.read(CHUNK_SIZE):
+            text = carry + chunk
+
+            # Keep any tag the chunk ends inside for the next chunk
+            cut = text.rfind("<")
+            if cut == -1 or ">" in text[cut:]:
+                cut = len(text)
+            links.update(HREF.findall(text, 0, cut))
+            carry = text[cut:]
+    links.update(HREF.findall(carry))
+    return sorted({name for name in map(resolve, links) if name is not None})
+
+
+def read_file_links(args):
+    """
+    Returns (filename, links) for a pool worker.
+    """
+    directory, filename = args
+    return filename, read_links(os.path.join(directory, filename))
+
+
+def load_cache(path):
+    """
+    Returns {filename: (mtime_ns, size, links)} from the cache at `path`,
+    or {} if it is missing or invalid.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return {}
+    if len(data) < PRELUDE.size:
+        return {}
+    magic, header_length = PRELUDE.unpack_from(data)
+    if magic != MAGIC:
+        return {}
+
+    # A damaged cache is treated as missing, and rebuilt by the crawl
+    try:
+        start = PRELUDE.size
+        header = json.loads(data[start:start + header_length])
+        start += header_length
+        if header["byteorder"] != sys.byteorder:
+            return {}
+
+        files = header["files"]
+        names = header["names"]
+        offsets = array("q")
+        offsets.frombytes(data[start:start + (len(files) + 1) * offsets.itemsize])
+        if len(offsets) != len(files) + 1:
+            return {}
+        start += len(offsets) * offsets.itemsize
+        targets = array("i")
+        targets.frombytes(data[start:])
+
+        return {
+            filename: (mtime_ns, size, [names[t] for t in targets[offsets[i]:offsets[i + 1]]])
+            for i, (filename, mtime_ns, size) in enumerate(files)
+        }
+    except (ValueError, KeyError, IndexError, TypeError):
+        return {}
+
+
+def save_cache(path, entries):
+    """
+    Writes {filename: (mtime_ns, size, links)} to the cache at `path`.
+    """
+    files = []
+    names = {}
+    offsets = array("q", [0])
+    targets = array("i")
+    for filename, (mtime_ns, size, links) in entries.items():
+        files.append([filename, mtime_ns, size])
+        targets.extend(names.setdefault(link, len(names)) for link in links)
+        offsets.append(len(targets))
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "files": files,
+        "names": list(names),
+    }).encode("utf-8")
+
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(PRELUDE.pack(MAGIC, len(header)))
+            f.write(header)
+            offsets.tofile(f)
+            targets.tofile(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        # Leave no partial cache behind
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def crawl(directory, processes=None, cache=True):
+    """
+    Returns {page: set of linked pages} for the HTML pages in `directory`,
+    as pagerank.crawl does, parsing only the pages that changed since the
+    cache was written (or every page, without `cache`).
+    """
+    cache_path = os.path.join(directory, CACHE_FILE)
+    cached = load_cache(cache_path) if cache else {}
+
+    entries = {}
+    changed = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if not entry.name.endswith(".html"):
+                continue
+            st = entry.stat()
+            hit = cached.get(entry.name)
+            if hit is not None and hit[:2] == (st.st_mtime_ns, st.st_size):
+                entries[entry.name] = hit
+            else:
+                entries[entry.name] = (st.st_mtime_ns, st.st_size, None)
+                changed.append(entry.name)
+
+    tasks = [(directory, filename) for filename in changed]
+    if len(tasks) < POOL_MIN:
+        parsed = list(map(read_file_links, tasks))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            parsed = pool.map(read_file_links, tasks, chunksize=64)
+    for filename, links in parsed:
+        mtime_ns, size, _ = entries[filename]
+        entries[filename] = (mtime_ns, size, links)
+
+    if cache and (changed or len(entries) != len(cached)):
+        try:
+            save_cache(cache_path, entries)
+        except OSError:
+            # A read-only corpus is still crawled, only without a cache
+            pass
+
+    # Only include links to other pages in the corpus
+    return {
+        filename: {link for link in links if link in entries and link != filename}
+        for filename, (_, _, links) in entries.items()
+    }
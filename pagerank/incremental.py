@@ -0,0 +1,145 @@
+"""
+Incremental PageRank under link insertions and deletions.
+
+When links change, the new ranks are r' = r + x, where x solves
+
+    x = d * P' x + d * (P' - P) r
+
+for the old and new transition matrices P and P'. The right-hand side is
+only nonzero around the pages whose links changed, so x is found by
+pushing that residual along links from page to page until every page's
+residual is below a tolerance, touching only the region it reaches.
+
+A page may link to the same page more than once, as in a LinkMatrix, each
+copy carrying its share of the page's rank.
+
+Pages without links spread their share over every page. Pushed residual
+that spreads that way adds up to a uniform vector c * 1, and the solution
+of y = c * 1 + d * P' y is a * r' with a = c * N / (1 - d), so it is folded
+in at the end as r' = (r + x) / (1 - a) instead of being pushed.
+"""
+
+from collections import Counter, deque
+
+import numpy as np
+
+from matrix import LinkMatrix, power_iteration
+
+# Residual below which a page is not pushed, relative to 1 / N
+PUSH_TOLERANCE = 1e-6
+
+
+class IncrementalPageRank():
+    """
+    PageRank of a LinkMatrix's pages, kept current as links are added
+    and removed. Links are pairs (source, target) of page indices; the
+    set of pages is fixed. Inserting a link adds a copy of it, and
+    deleting one removes a copy, if there is one.
+    """
+
+    def __init__(self, links, damping_factor, ranks=None, tolerance=PUSH_TOLERANCE):
+        self.pages = links.pages
+        self.damping_factor = damping_factor
+        self.tolerance = tolerance
+        by_source = links.matrix.tocsc()
+        self.n = by_source.shape[0]
+        self.offsets = by_source.indptr
+        self.targets = by_source.indices
+
+        # Out-links of pages changed since the arrays were built
+        self.changed = {}
+        if ranks is None:
+            ranks, _ = power_iteration(links, damping_factor)
+        self.ranks = np.array(ranks, dtype=float)
+
+    def out_links(self, page):
+        """
+        Returns the sorted list of pages that page index `page` links to,
+        once per link.
+        """
+        if page in self.changed:
+            return self.changed[page]
+        return sorted(self.targets[self.offsets[page]:self.offsets[page + 1]].tolist())
+
+    def link_matrix(self):
+        """
+        Returns a LinkMatrix of the current links.
+        """
+        sources = np.repeat(np.arange(self.n), np.diff(self.offsets))
+        keep = ~np.isin(sources, list(self.changed))
+        sources = [sources[keep]]
+        targets = [self.targets[keep]]
+        for page, links in self.changed.items():
+            sources.append(np.full(len(links), page))
+            targets.append(np.fromiter(links, dtype=np.int64, count=len(links)))
+        return LinkMatrix(self.pages, np.concatenate(sources), np.concatenate(targets))
+
+    def update(self, inserted=(), deleted=()):
+        """
+        Adds the `inserted` links, removes the `deleted` ones and updates
+        the ranks. Returns the number of pushes it took.
+        """
+        d = self.damping_factor
+        n = self.n
+        epsilon = self.tolerance / n
+        residual = {}
+        spread = 0.0
+
+        # Residual d * (P' - P) r from each page whose links change
+        edits = {}
+        for source, target in inserted:
+            edits.setdefault(source, ([], []))[0].append(target)
+        for source, target in deleted:
+            edits.setdefault(source, ([], []))[1].append(target)
+        for source, (added, removed) in edits.items():
+            old = self.out_links(source)
+            counts = Counter(old)
+            counts.update(added)
+            counts.subtract(removed)
+            new = sorted(counts.elements())
+            if new == old:
+                continue
+            self.changed[source] = new
+            rank = d * self.ranks[source]
+            for links, sign in ((old, -1), (new, 1)):
+                if not links:
+                    spread += sign * rank / n
+                    continue
+                share = sign * rank / len(links)
+                for target in links:
+                    residual[target] = residual.get(target, 0.0) + share
+
+        # Push residuals along the new links until they are all small
+        x = {}
+        queue = deque(page for page, r in residual.items() if abs(r) > epsilon)
+        pushes = 0
+        while queue:
+            page = queue.popleft()
+            r = residual.pop(page, 0.0)
+            if not r:
+                continue
+            pushes += 1
+            x[page] = x.get(page, 0.0) + r
+            links = self.out_links(page)
+            if not links:
+                spread += d * r / n
+                continue
+            share = d * r / len(links)
+            for target in links:
+                before = residual.get(target, 0.0)
+                residual[target] = before + share
+                if abs(before) <= epsilon < abs(before + share):
+                    queue.append(target)
+
+        if x:
+            pages = np.fromiter(x.keys(), dtype=np.int64, count=len(x))
+            self.ranks[pages] += np.fromiter(x.values(), dtype=float, count=len(x))
+        if spread:
+            self.ranks /= 1 - spread * n / (1 - d)
+        return pushes
+
+    def to_dict(self):
+        """
+        Returns {page: rank} for the current ranks.
+        """
+        return dict(zip(self.pages, self.ranks.tolist()))
@@ -0,0 +1,176 @@
+"""
+Sparse power-iteration PageRank.
+
+The links of a corpus are kept as a CSR matrix M over page indices, where
+M[t, s] = 1 / outdegree(s) for each link from page s to page t. Each
+iteration computes
+
+    r' = d * M r + (d * dangling + 1 - d) / N
+
+where `dangling` is the total rank of pages without links, which spread it
+over every page. That is the same as linking them to every page, without
+storing those N links per dangling page. Personalized PageRank replaces
+the uniform 1 / N with a teleport vector v over the pages.
+"""
+
+from array import array
+
+import numpy as np
+from scipy import sparse
+
+# Stop once the ranks change by less than this in total (L1 norm)
+TOLERANCE = 1e-10
+MAX_ITERATIONS = 1000
+
+# Teleport columns personalized_ranks iterates on together
+BATCH_SIZE = 16
+
+
+class LinkMatrix():
+    """
+    Column-stochastic CSR link matrix of a corpus with pages 0..N-1,
+    and the indices of its dangling pages.
+    """
+
+    def __init__(self, pages, sources, targets):
+        self.pages = pages
+        n = len(pages)
+        index_type = np.int32 if n < 2 ** 31 else np.int64
+        sources = np.asarray(sources, dtype=index_type)
+        targets = np.asarray(targets, dtype=index_type)
+        out_degree = np.bincount(sources, minlength=n)
+        self.dangling = np.flatnonzero(out_degree == 0)
+
+        # Build the CSR arrays directly, sorting links by target, rather
+        # than through a COO matrix and its extra copies of every link
+        order = np.argsort(targets)
+        indices = sources[order]
+        del order
+        indptr = np.zeros(n + 1, dtype=index_type)
+        np.cumsum(np.bincount(targets, minlength=n), out=indptr[1:])
+        with np.errstate(divide="ignore"):
+            weights = 1 / out_degree
+        self.matrix = sparse.csr_matrix((weights[indices], indices, indptr), shape=(n, n))
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Returns the link matrix of a {page: set of linked pages} corpus,
+        as returned by crawl. Links to pages outside the corpus are ignored.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        sources = array("i")
+        targets = array("i")
+        for page in pages:
+            for link in corpus[page]:
+                if link in index:
+                    sources.append(index[page])
+                    targets.append(index[link])
+        return cls(pages, np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int32))
+
+    @classmethod
+    def from_edges(cls, n, sources, targets):
+        """
+        Returns the link matrix of pages 0..n-1 with links from each of
+        `sources` to the matching entry of `targets`.
+        """
+        return cls(range(n), sources, targets)
+
+    def to_dict(self, ranks):
+        """
+        Returns {page: rank} for a rank vector over this matrix's pages.
+        """
+        return dict(zip(self.pages, ranks.tolist()))
+
+
+def power_iteration(links, damping_factor, tolerance=TOLERANCE,
+                    max_iterations=MAX_ITERATIONS, ranks=None, teleport=None,
+                    residuals=None):
+    """
+    Returns (ranks, iterations): the PageRank vector of a LinkMatrix,
+    iterated from `ranks` (uniform by default) until the L1 change of an
+    iteration is below `tolerance`, and the number of iterations run.
+
+    The surfer jumps to a page drawn from `teleport`, a vector over the
+    pages summing to 1 (uniform by default), both when it stops following
+    links and when it leaves a dangling page. Given an N x k block of
+    teleport columns, computes the k personalized rank vectors together
+    as the columns of `ranks`, until each has converged.
+
+    Appends the L1 change of each iteration to `residuals`, if given.
+    """
+    n = links.matrix.shape[0]
+    shape = n if teleport is None else np.shape(teleport)
+    if teleport is not None:
+        # Teleport vectors are mostly zeros for seed sets, so each
+        # iteration only adds their nonzero entries
+        teleport = np.asarray(teleport, dtype=float)
+        where = np.nonzero(teleport)
+        weights = teleport[where]
+    if ranks is None:
+        ranks = np.full(shape, 1 / n)
+    else:
+        ranks = np.array(ranks, dtype=float)
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        restart = damping_factor * ranks[links.dangling].sum(axis=0) + 1 - damping_factor
+        new_ranks = links.matrix @ ranks
+        new_ranks *= damping_factor
+        if teleport is None:
+            new_ranks += restart / n
+        elif teleport.ndim == 1:
+            new_ranks[where] += restart * weights
+        else:
+            new_ranks[where] += restart[where[1]] * weights
+
+        # The old ranks are not needed past here, so reuse them for the change
+        np.subtract(new_ranks, ranks, out=ranks)
+        np.abs(ranks, out=ranks)
+        delta = ranks.sum(axis=0).max()
+        ranks = new_ranks
+        if residuals is not None:
+            residuals.append(delta)
+        if delta < tolerance:
+            break
+    return ranks, iterations
+
+
+def teleport_block(links, teleports):
+    """
+    Returns the N x k block of teleport columns for a list of k
+    {page: weight} dicts, each scaled to sum to 1.
+
+    Raises ValueError for a page outside the matrix, a negative weight
+    or a dict whose weights do not sum to more than 0.
+    """
+    index = {page: i for i, page in enumerate(links.pages)}
+    block = np.zeros((len(links.pages), len(teleports)))
+    for column, weights in enumerate(teleports):
+        for page, weight in weights.items():
+            if page not in index:
+                raise ValueError(f"teleport page {page!r} is not in the corpus")
+            if not weight >= 0:
+                raise ValueError(f"teleport weight of {page!r} must be at least 0, got {weight}")
+            block[index[page], column] = weight
+    totals = block.sum(axis=0)
+    if not np.all(totals > 0):
+        raise ValueError("teleport weights must sum to more than 0")
+    return block / totals
+
+
+def personalized_ranks(links, damping_factor, teleports, tolerance=TOLERANCE,
+                       batch_size=BATCH_SIZE):
+    """
+    Returns the N x k block of personalized rank vectors of a LinkMatrix
+    for an N x k block of teleport columns, iterating over `batch_size`
+    columns at a time.
+    """
+    ranks = np.empty(teleports.shape)
+    for start in range(0, teleports.shape[1], batch_size):
+        block = teleports[:, start:start + batch_size]
+        ranks[:, start:start + batch_size], _ = power_iteration(
+            links, damping_factor, tolerance, teleport=block
+        )
+    return ranks
@@ -1,51 +1,44 @@
-import os
-import random
-import re
 import sys
 
+import crawler
+from matrix import TOLERANCE, LinkMatrix, personalized_ranks, teleport_block
+from sampler import CHAINS, LinkSampler
+from solvers import SOLVER, solve
+
 DAMPING = 0.85
 SAMPLES = 10000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    args = sys.argv[1:]
+    show_stats = "--stats" in args
+    if show_stats:
+        args.remove("--stats")
+    if len(args) != 1:
+        sys.exit("Usage: python pagerank.py [--stats] corpus")
+    corpus = crawl(args[0])
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    ranks, stats = iterate_pagerank(corpus, DAMPING, stats=True)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
+    if show_stats:
+        print(f"  {stats}")
 
 
-def crawl(directory):
+def crawl(directory, cache=True):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
 
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
-
-    return pages
+    Pages are parsed in parallel, and with `cache`, links are cached by
+    crawler.py so that crawling again only parses the pages that changed.
+    """
+    return crawler.crawl(directory, cache=cache)
 
 
 def transition_model(corpus, page, damping_factor):
@@ -72,7 +65,7 @@ def transition_model(corpus, page, damping_factor):
     
     return ans
         
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, chains=CHAINS, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -80,20 +73,17 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    The samples are split over `chains` independent surfers stepped
+    together after a warm-up of BURN_IN steps each, drawn from a
+    generator seeded with `seed`.
     """
-    ans = dict.fromkeys(corpus, 0)
-    prob = 1 / n
-    page_list = list(corpus.keys())
-    curr = random.choice(page_list)
-    ans[curr] += prob
-    for i in range(n - 1):
-        trans_dict = transition_model(corpus, curr, damping_factor)
-        curr = random.choices(page_list, weights=list(trans_dict.values()))[0]
-        ans[curr] += prob
-    return ans
+    links = LinkMatrix.from_corpus(corpus)
+    shares = LinkSampler(links).sample(damping_factor, n, chains, seed)
+    return links.to_dict(shares)
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE, solver=SOLVER, stats=False):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -101,31 +91,42 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Runs the named solver from solvers.py until the ranks change by less
+    than `tolerance` in total. The corpus is left unchanged, so it can be
+    ranked again or sampled after.
+
+    With `stats`, return (ranks, stats) instead, where stats is the
+    solver's SolverStats: the change of each iteration and the time taken.
     """
+    links = LinkMatrix.from_corpus(corpus)
+    ranks, solver_stats = solve(links, damping_factor, solver, tolerance)
+    if stats:
+        return links.to_dict(ranks), solver_stats
+    return links.to_dict(ranks)
 
-    parent_page = {page: set() for page in corpus}
+def personalized_pagerank(corpus, damping_factor, teleport, tolerance=TOLERANCE):
+    """
+    Return PageRank values for each page when the random surfer jumps to
+    pages drawn from `teleport`, a dictionary of page weights, instead of
+    to any page with equal probability.
 
-    for parent in corpus:
-        if len(corpus[parent]) == 0:
-            corpus[parent] = set(corpus.keys())
-        for child in corpus[parent]:
-            parent_page[child].add(parent)
+    Raise ValueError if a weight is negative, the weights do not sum to
+    more than 0, or a page is not in the corpus.
+    """
+    return personalized_pageranks(corpus, damping_factor, [teleport], tolerance)[0]
+
+
+def personalized_pageranks(corpus, damping_factor, teleports, tolerance=TOLERANCE):
+    """
+    Return a list of the personalized PageRank dictionaries for each of
+    a list of `teleport` weight dictionaries, computed together over one
+    link matrix.
+    """
+    links = LinkMatrix.from_corpus(corpus)
+    ranks = personalized_ranks(links, damping_factor, teleport_block(links, teleports), tolerance)
+    return [links.to_dict(column) for column in ranks.T]
 
-    page_count = len(corpus)
-    prev = dict.fromkeys(corpus, 1 / page_count)
-    ans = dict.fromkeys(corpus, 1 / page_count)
-    can_continue = True
-    loop_count = 0
-    while(can_continue):
-        loop_count += 1
-        can_continue = False
-        for key in list(ans.keys()):
-            parents = parent_page[key]
-            sigma = sum(prev[parent] / len(corpus[parent]) for parent in parents)
-            ans[key] = (1 - damping_factor) / page_count + damping_factor * sigma
-            can_continue = can_continue or abs(ans[key] - prev[key]) >= 0.001
-        prev = ans.copy()
-    return ans
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,67 @@
+"""
+Vectorized random-surfer sampling of PageRank.
+
+Instead of building a transition model dict per step, the out-links of
+every page are kept in one CSR array, so a step picks a link of page p
+as targets[offsets[p] + floor(u * outdegree(p))]. Links of a page are
+equally likely, so that index is all an alias table would give. Many
+independent chains are advanced together, one NumPy batch per step.
+"""
+
+import numpy as np
+
+# Independent chains sample_pagerank runs side by side
+CHAINS = 1000
+
+# Steps each chain takes before its samples count, so the bias toward its
+# uniform start (which decays as damping_factor ** steps) is negligible
+BURN_IN = 100
+
+
+class LinkSampler():
+    """
+    Out-link arrays of a LinkMatrix, for stepping many random surfers at once.
+    """
+
+    def __init__(self, links):
+        by_source = links.matrix.tocsc()
+        self.n = by_source.shape[0]
+        self.offsets = by_source.indptr
+        self.targets = by_source.indices
+        self.out_degree = np.diff(self.offsets)
+
+    def step(self, pages, damping_factor, rng):
+        """
+        Returns the pages the surfers on `pages` visit next: with
+        probability `damping_factor`, a random link of their page, and
+        otherwise (or from a page without links) a random page.
+        """
+        next_pages = rng.integers(0, self.n, len(pages))
+        follow = (rng.random(len(pages)) < damping_factor) & (self.out_degree[pages] > 0)
+        chosen = pages[follow]
+        picks = (rng.random(len(chosen)) * self.out_degree[chosen]).astype(np.int64)
+        next_pages[follow] = self.targets[self.offsets[chosen] + picks]
+        return next_pages
+
+    def sample(self, damping_factor, n, chains=CHAINS, seed=None, burn_in=BURN_IN):
+        """
+        Returns the share of `n` samples that landed on each page, taken
+        from `chains` surfers that each start on a random page and take
+        `burn_in` steps before sampling. Results are reproducible for a
+        given `seed`.
+        """
+        rng = np.random.default_rng(seed)
+        chains = max(1, min(chains, n))
+        counts = np.zeros(self.n, dtype=np.int64)
+        pages = rng.integers(0, self.n, chains)
+        for _ in range(burn_in):
+            pages = self.step(pages, damping_factor, rng)
+        taken = 0
+        while True:
+            batch = pages[:n - taken]
+            counts += np.bincount(batch, minlength=self.n)
+            taken += len(batch)
+            if taken == n:
+                break
+            pages = self.step(pages, damping_factor, rng)
+        return counts / n
@@ -0,0 +1,150 @@
+"""
+Pluggable PageRank solvers with convergence statistics.
+
+Every solver returns the ranks of a LinkMatrix together with a SolverStats
+holding the L1 change of each iteration and the wall time taken.
+
+    power          power iteration, as matrix.power_iteration
+    gauss-seidel   Gauss-Seidel sweeps over (I - d M) y = 1, normalized;
+                   r is proportional to y once dangling pages spread
+                   their rank like the teleport does
+    extrapolation  power iteration with quadratic extrapolation from the
+                   last four iterates every few iterations
+"""
+
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+from matrix import MAX_ITERATIONS, TOLERANCE, power_iteration
+
+SOLVER = "power"
+
+# Power iterations between quadratic extrapolations
+EXTRAPOLATION_PERIOD = 10
+
+
+class SolverStats():
+    """
+    Convergence record of one solver run: the L1 change of the ranks
+    at each iteration and the wall time of the run.
+    """
+
+    def __init__(self, solver, tolerance):
+        self.solver = solver
+        self.tolerance = tolerance
+        self.residuals = []
+        self.seconds = 0.0
+
+    @property
+    def iterations(self):
+        return len(self.residuals)
+
+    @property
+    def converged(self):
+        return bool(self.residuals) and self.residuals[-1] < self.tolerance
+
+    def __str__(self):
+        residual = self.residuals[-1] if self.residuals else float("nan")
+        return (f"{self.solver}: {self.iterations} iterations, {self.seconds * 1000:.1f} ms, "
+                f"last residual {residual:.2e}{'' if self.converged else ' (not converged)'}")
+
+
+def power(links, damping_factor, tolerance, max_iterations, stats):
+    """
+    Returns the ranks of a LinkMatrix by power iteration.
+    """
+    ranks, _ = power_iteration(links, damping_factor, tolerance, max_iterations,
+                               residuals=stats.residuals)
+    return ranks
+
+
+def gauss_seidel(links, damping_factor, tolerance, max_iterations, stats):
+    """
+    Returns the ranks of a LinkMatrix by Gauss-Seidel iteration, each
+    sweep solving the lower triangle of the system against the latest
+    ranks with one sparse triangular solve.
+    """
+    n = links.matrix.shape[0]
+    scaled = damping_factor * links.matrix
+    lower = (sparse.identity(n, format="csc") - sparse.tril(scaled, format="csc")).tocsc()
+    upper = sparse.triu(scaled, k=1, format="csr")
+    ones = np.ones(n)
+
+    # Factoring the triangle in its own order has no fill-in, and lets
+    # each sweep reuse it instead of re-checking the matrix every solve
+    triangle = splu(lower, permc_spec="NATURAL", diag_pivot_thresh=0,
+                    options={"SymmetricMode": True})
+
+    y = ones
+    ranks = ones / n
+    while stats.iterations < max_iterations:
+        y = triangle.solve(ones + upper @ y)
+        new_ranks = y / y.sum()
+        stats.residuals.append(np.abs(new_ranks - ranks).sum())
+        ranks = new_ranks
+        if stats.residuals[-1] < tolerance:
+            break
+    return ranks
+
+
+def extrapolate(x0, x1, x2, x3):
+    """
+    Returns the quadratic extrapolation of four successive power iterates,
+    which removes the error along the next two eigenvectors.
+    """
+    y1, y2, y3 = x1 - x0, x2 - x0, x3 - x0
+
+    # Least squares [y1 y2] g = -y3, by its 2 x 2 normal equations
+    gram = np.array([[y1 @ y1, y1 @ y2], [y2 @ y1, y2 @ y2]])
+    try:
+        g1, g2 = np.linalg.solve(gram, -np.array([y1 @ y3, y2 @ y3]))
+    except np.linalg.LinAlgError:
+        return x3
+    ranks = (g1 + g2 + 1) * x1 + (g2 + 1) * x2 + x3
+    np.maximum(ranks, 0, out=ranks)
+    return ranks / ranks.sum()
+
+
+def extrapolated(links, damping_factor, tolerance, max_iterations, stats):
+    """
+    Returns the ranks of a LinkMatrix by power iteration, replacing every
+    EXTRAPOLATION_PERIOD-th iterate by its quadratic extrapolation.
+    """
+    n = links.matrix.shape[0]
+    history = [np.full(n, 1 / n)]
+    ranks = history[0]
+    while stats.iterations < max_iterations:
+        ranks, _ = power_iteration(links, damping_factor, 0, 1, ranks=history[-1],
+                                   residuals=stats.residuals)
+        if stats.residuals[-1] < tolerance:
+            break
+        history = history[-3:] + [ranks]
+        if len(history) == 4 and stats.iterations % EXTRAPOLATION_PERIOD == 0:
+            history = [extrapolate(*history)]
+    return ranks
+
+
+SOLVERS = {
+    "power": power,
+    "gauss-seidel": gauss_seidel,
+    "extrapolation": extrapolated,
+}
+
+
+def solve(links, damping_factor, solver=SOLVER, tolerance=TOLERANCE,
+          max_iterations=MAX_ITERATIONS):
+    """
+    Returns (ranks, stats): the PageRank vector of a LinkMatrix found by
+    the named solver, iterating until the L1 change of an iteration is
+    below `tolerance`, and its SolverStats.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"unknown solver {solver}, choose from {', '.join(SOLVERS)}")
+    stats = SolverStats(solver, tolerance)
+    start = time.perf_counter()
+    ranks = SOLVERS[solver](links, damping_factor, tolerance, max_iterations, stats)
+    stats.seconds = time.perf_counter() - start
+    return ranks, stats
@@ -0,0 +1,171 @@
+"""
+Perfect-play opening book for tic-tac-toe.
+
+The book stores, for the canonical code of every reachable position that
+is not over, the value of the position under perfect play and the set of
+moves that keep that value. Positions are stored once per symmetry class,
+with moves in the frame of the canonical board.
+
+Layout: an 8 byte magic, the board shape (m, n, k) and the entry count,
+then one fixed-size record (code, moves mask, value) per position sorted
+by code, all little-endian.
+
+Usage: python book.py build|verify [file]
+"""
+
+import os
+import struct
+import sys
+
+MAGIC = b"TTTBOOK1"
+PRELUDE = struct.Struct("<8sBBBI")
+RECORD = struct.Struct("<IHb")
+
+# Book file kept next to this module
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+
+
+class Book():
+    """
+    Perfect-play moves and values of every reachable position of an
+    m x n board where k in a row wins: {canonical code: (moves mask, value)},
+    with values 1, 0 or -1 as for utility.
+    """
+
+    def __init__(self, m, n, k, entries):
+        self.m, self.n, self.k = m, n, k
+        self.entries = entries
+
+    @classmethod
+    def build(cls, game):
+        """
+        Solves every reachable position of `game` and returns its book.
+        """
+        game.solve()
+        entries = {}
+        for code, v in game.table.items():
+            xs, os = code >> game.size, code & game.full
+            if game.terminal(xs, os):
+                continue
+            x_to_move = xs.bit_count() == os.bit_count()
+            moves = 0
+            for b in range(game.size):
+                bit = 1 << b
+                if (xs | os) & bit:
+                    continue
+                child = game.value(xs | bit, os) if x_to_move else game.value(xs, os | bit)
+                if child == v:
+                    moves |= bit
+            entries[code] = (moves, v)
+        return cls(game.m, game.n, game.k, entries)
+
+    def save(self, path):
+        """
+        Writes the book to `path`.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(PRELUDE.pack(MAGIC, self.m, self.n, self.k, len(self.entries)))
+            for code in sorted(self.entries):
+                moves, v = self.entries[code]
+                f.write(RECORD.pack(code, moves, v))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns the book saved at `path`, or None if it is missing or invalid.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < PRELUDE.size:
+            return None
+        magic, m, n, k, count = PRELUDE.unpack_from(data)
+        if magic != MAGIC or len(data) != PRELUDE.size + count * RECORD.size:
+            return None
+        entries = {
+            code: (moves, v)
+            for code, moves, v in RECORD.iter_unpack(data[PRELUDE.size:])
+        }
+        return cls(m, n, k, entries)
+
+    def covers(self, game):
+        """
+        Returns True if the book is for the board shape of `game`.
+        """
+        return (self.m, self.n, self.k) == (game.m, game.n, game.k)
+
+    def lookup(self, game, xs, os):
+        """
+        Returns (moves, value) for a bitboard of `game`: the cell bits of
+        its perfect-play moves in increasing order and its value, or None
+        if the position is over or not in the book.
+        """
+        code, s = game.canonical(xs, os)
+        entry = self.entries.get(code)
+        if entry is None:
+            return None
+        moves, v = entry
+        permute = game.permute[s]
+        return [b for b in range(game.size) if permute[1 << b] & moves], v
+
+
+def verify(ttt, book):
+    """
+    Checks every book entry against a fresh alpha-beta search of each
+    move, using tictactoe module `ttt`. Returns the number of positions
+    checked and a list of the codes that do not match.
+    """
+    game = ttt.get_game(book.m, book.n, book.k)
+    mismatches = []
+    for code, (moves, v) in book.entries.items():
+        xs, os = code >> game.size, code & game.full
+        x_to_move = xs.bit_count() == os.bit_count()
+        me, them = (xs, os) if x_to_move else (os, xs)
+        free = game.size - (xs | os).bit_count()
+
+        # Exact values of each move for the player to move
+        values = {}
+        for b in range(game.size):
+            if (xs | os) >> b & 1:
+                continue
+            search = ttt.Search(game)
+            score = -search.negamax(them, me | 1 << b, b, free - 1, -ttt.INF, ttt.INF, 1)
+            values[b] = (score > 0) - (score < 0)
+        best = max(values.values())
+        searched = sum(1 << b for b, score in values.items() if score == best)
+        if searched != moves or (best if x_to_move else -best) != v:
+            mismatches.append(code)
+    return len(book.entries), mismatches
+
+
+def main():
+    if len(sys.argv) not in (2, 3) or sys.argv[1] not in ("build", "verify"):
+        sys.exit("Usage: python book.py build|verify [file]")
+    path = sys.argv[2] if len(sys.argv) == 3 else BOOK_FILE
+
+    # Imported here since tictactoe itself loads the book from this module
+    import tictactoe as ttt
+
+    if sys.argv[1] == "build":
+        book = Book.build(ttt.get_game(3, 3, ttt.K))
+        book.save(path)
+        print(f"Saved {len(book.entries)} positions to {path}.")
+        return
+
+    book = Book.load(path)
+    if book is None:
+        sys.exit(f"No book at {path}.")
+    checked, mismatches = verify(ttt, book)
+    for code in mismatches:
+        print(f"Mismatch at position {code}")
+    print(f"Checked {checked} positions, {len(mismatches)} mismatches.")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
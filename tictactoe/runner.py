@@ -4,6 +4,10 @@ import time
 
 import tictactoe as ttt
 
+# Serve the computer's moves from the opening book (python book.py build)
+if not ttt.load_book():
+    print("No opening book found, searching moves instead.")
+
 pygame.init()
 size = width, height = 600, 400
 
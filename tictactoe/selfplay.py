@@ -0,0 +1,184 @@
+"""
+Headless self-play harness for the tic-tac-toe engine.
+
+Plays many games between two agents across a process pool and reports
+the results, games per second, nodes searched per move and per-move
+latency percentiles of each agent.
+
+Agents:
+    minimax  fresh alpha-beta search of every move, within DEADLINE
+    cached   tictactoe.minimax, served from the book or transposition table;
+             its nodes are the table entries a move adds
+    random   a uniformly random legal move
+
+Usage: python selfplay.py [--games=N] [--x=AGENT] [--o=AGENT]
+                          [--processes=N] [--size=MxN] [--k=K]
+                          [--deadline=SECONDS] [--seed=N]
+"""
+
+import multiprocessing
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+GAMES = 1000
+
+
+def search_agent(board, rng):
+    return ttt.alphabeta(board, deadline=ttt.DEADLINE)
+
+
+def cached_agent(board, rng):
+    game = ttt.game_of(board)
+    if game.size > ttt.SOLVE_CELLS and (ttt.book is None or not ttt.book.covers(game)):
+        # Boards too large to solve are searched afresh by minimax too
+        return search_agent(board, rng)
+    before = len(game.table)
+    return ttt.minimax(board), len(game.table) - before
+
+
+def random_agent(board, rng):
+    return rng.choice(sorted(ttt.actions(board))), 0
+
+
+# Agents map a board and a random.Random to (action, nodes searched)
+AGENTS = {
+    "minimax": search_agent,
+    "cached": cached_agent,
+    "random": random_agent,
+}
+
+
+def play_game(agents, m, n, seed):
+    """
+    Plays one game from an empty m x n board between `agents`, a
+    {player: agent name} dict. Returns (winner, moves), where moves is a
+    list of (player, nodes, seconds) for each move.
+    """
+    rng = random.Random(seed)
+    board = ttt.initial_state(m, n)
+    moves = []
+    while not ttt.terminal(board):
+        player = ttt.player(board)
+        start = time.perf_counter()
+        action, nodes = AGENTS[agents[player]](board, rng)
+        elapsed = time.perf_counter() - start
+        board = ttt.result(board, action)
+        moves.append((player, nodes, elapsed))
+    return ttt.winner(board), moves
+
+
+def play_games(args):
+    """
+    Plays the games with the given seeds, for a pool worker.
+    """
+    agents, m, n, seeds = args
+    return [play_game(agents, m, n, seed) for seed in seeds]
+
+
+def percentile(values, q):
+    """
+    Returns the q-th quantile of a sorted list of values.
+    """
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run(agents, games, m=3, n=3, processes=None, seed=0):
+    """
+    Plays `games` games across a pool of `processes` workers and returns
+    (results, stats, seconds): a {winner: count} dict with None for
+    draws, {player: (moves, nodes, sorted latencies)}, and the wall time.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    seeds = list(range(seed, seed + games))
+    chunk = max(1, games // (processes * 4))
+    batches = [(agents, m, n, seeds[i:i + chunk]) for i in range(0, games, chunk)]
+
+    start = time.perf_counter()
+    with multiprocessing.get_context("fork").Pool(processes) as pool:
+        played = [game for batch in pool.imap_unordered(play_games, batches) for game in batch]
+    seconds = time.perf_counter() - start
+
+    results = {ttt.X: 0, ttt.O: 0, None: 0}
+    nodes = {ttt.X: 0, ttt.O: 0}
+    latencies = {ttt.X: [], ttt.O: []}
+    for winner, moves in played:
+        results[winner] += 1
+        for player, searched, elapsed in moves:
+            nodes[player] += searched
+            latencies[player].append(elapsed)
+    stats = {
+        player: (len(latencies[player]), nodes[player], sorted(latencies[player]))
+        for player in (ttt.X, ttt.O)
+    }
+    return results, stats, seconds
+
+
+def parse_args(argv):
+    """
+    Returns the options given as --name=value arguments, with defaults,
+    exiting with a usage message if they are malformed.
+    """
+    usage = ("Usage: python selfplay.py [--games=N] [--x=AGENT] [--o=AGENT] "
+             "[--processes=N] [--size=MxN] [--k=K] [--deadline=SECONDS] [--seed=N]")
+    options = {
+        "games": GAMES, "x": "minimax", "o": "minimax", "processes": None,
+        "size": (3, 3), "k": ttt.K, "deadline": ttt.DEADLINE, "seed": 0,
+    }
+    try:
+        for arg in argv:
+            name, _, value = arg[2:].partition("=")
+            if not arg.startswith("--") or name not in options or not value:
+                sys.exit(usage)
+            if name in ("games", "processes", "k", "seed"):
+                options[name] = int(value)
+            elif name == "deadline":
+                options[name] = float(value)
+            elif name == "size":
+                m, n = value.split("x")
+                options[name] = (int(m), int(n))
+            else:
+                options[name] = value
+    except ValueError:
+        sys.exit(usage)
+    counts = [options["games"], options["k"], options["deadline"], *options["size"]]
+    if options["processes"] is not None:
+        counts.append(options["processes"])
+    if not all(count > 0 for count in counts):
+        sys.exit(usage)
+    for name in ("x", "o"):
+        if options[name] not in AGENTS:
+            sys.exit(f"Unknown agent {options[name]}, choose from {', '.join(AGENTS)}.")
+    return options
+
+
+def main():
+    options = parse_args(sys.argv[1:])
+    m, n = options["size"]
+    ttt.K = options["k"]
+    ttt.DEADLINE = options["deadline"]
+    ttt.load_book()
+    agents = {ttt.X: options["x"], ttt.O: options["o"]}
+    games = options["games"]
+
+    results, stats, seconds = run(agents, games, m, n, options["processes"], options["seed"])
+
+    print(f"{games} games on {m}x{n}, {ttt.K} in a row: "
+          f"X ({agents[ttt.X]}) won {results[ttt.X]}, "
+          f"O ({agents[ttt.O]}) won {results[ttt.O]}, {results[None]} drawn")
+    print(f"{games / seconds:.1f} games/sec")
+    for player in (ttt.X, ttt.O):
+        moves, nodes, latencies = stats[player]
+        if not moves:
+            continue
+        print(f"{player} ({agents[player]}): {moves} moves, {nodes / moves:.1f} nodes/move, "
+              f"latency p50 {percentile(latencies, 0.5) * 1000:.3f} ms, "
+              f"p95 {percentile(latencies, 0.95) * 1000:.3f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.3f} ms, "
+              f"max {latencies[-1] * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,172 +1,494 @@
 """
 Tic Tac Toe Player
+
+Plays on any m x n board where k marks in a row win. The board shape comes
+from the list board and k from K. Boards small enough are solved outright;
+larger ones are searched by iterative deepening within DEADLINE seconds.
 """
 
-import copy
-import math
+import time
+from functools import lru_cache
+
+from book import BOOK_FILE, Book
 
 X = "X"
 O = "O"
 EMPTY = None
 
-def initial_state():
+# Marks in a row needed to win
+K = 3
+
+# Seconds minimax may spend searching a board it has not solved
+DEADLINE = 1.0
+
+# Boards with at most this many cells are solved outright
+SOLVE_CELLS = 9
+
+# Opening book that minimax serves moves from, once loaded
+book = None
+
+def initial_state(m=3, n=3):
     """
-    Returns starting state of the board.
+    Returns starting state of an m x n board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * n for _ in range(m)]
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    return O if sum(row.count(X) for row in board) > sum(row.count(O) for row in board) else X
+    return bits_player(*game_of(board).to_bits(board))
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    set_actions = set()
-    for row in range(len(board)):
-        for col in range(len(board)):
-            if board[row][col] is EMPTY:
-                set_actions.add((row, col))
-    return set_actions
+    game = game_of(board)
+    xs, os = game.to_bits(board)
+    free = game.full & ~(xs | os)
+    return {game.cells[b] for b in range(game.size) if free >> b & 1}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    if action not in actions(board):
+    game = game_of(board)
+    xs, os = game.to_bits(board)
+    if action not in game.cell_bits or (xs | os) & game.cell_bits[action]:
         raise  Exception("Invalid action in this state!")
-    next_state = copy.deepcopy(board)
-    next_state[action[0]][action[1]] = player(board)
-    return next_state
+    if bits_player(xs, os) is X:
+        xs |= game.cell_bits[action]
+    else:
+        os |= game.cell_bits[action]
+    return game.from_bits(xs, os)
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    for row in board:
-        if row.count(X) == 3:
-            return X
-        if row.count(O) == 3:
-            return O
-        
-    col_0 = []
-    col_1 = []
-    col_2 = []
-    diag_dec = []
-    diag_inc = []
-    for i in range(3):
-        col_0.append(board[i][0])
-        col_1.append(board[i][1])
-        col_2.append(board[i][2])
-        diag_dec.append(board[i][i])
-        diag_inc.append(board[i][2 - i])
-    threes = [col_0, col_1, col_2, diag_dec, diag_inc]
-    for three in threes:
-        if EMPTY in three:
-            continue
-        elif three.count(X) == 3:
-            return X
-        elif three.count(O) == 3:
-            return O
-        
-    return None
+    game = game_of(board)
+    xs, os = game.to_bits(board)
+    return X if game.won(xs) else O if game.won(os) else None
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    empty_count = sum(row.count(EMPTY) for row in board)
-    if winner(board) is not None or empty_count == 0:
-        return True
-    return False
+    game = game_of(board)
+    return game.terminal(*game.to_bits(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    return 1 if winner(board) is X else -1 if winner(board) is O else 0
+    game = game_of(board)
+    return game.utility(*game.to_bits(board))
+
+
+def bits_player(xs, os):
+    """
+    Returns player who has the next turn on a bitboard.
+    """
+    return O if xs.bit_count() > os.bit_count() else X
+
+
+# Boards with at most this many cells get lookup tables of every mask
+TABLE_CELLS = 12
+
+# Search score of a win, less the plies it takes, so faster wins score higher
+WIN = 1 << 40
+INF = WIN + 1
+
+
+class Game():
+    """
+    Bitboard tables for an m x n board where k marks in a row win.
+
+    A board is a pair of masks (xs, os) of the cells holding X and O,
+    where cell (i, j) is bit n * i + j.
+    """
+
+    def __init__(self, m, n, k):
+        self.m, self.n, self.k = m, n, k
+        self.size = m * n
+        self.full = (1 << self.size) - 1
+        self.cells = [(i, j) for i in range(m) for j in range(n)]
+        self.cell_bits = {cell: 1 << b for b, cell in enumerate(self.cells)}
+
+        # Masks of every run of k cells along a row, column or diagonal
+        self.lines = []
+        for i, j in self.cells:
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                if 0 <= i + (k - 1) * di < m and 0 <= j + (k - 1) * dj < n:
+                    self.lines.append(sum(self.cell_bits[i + s * di, j + s * dj]
+                                          for s in range(k)))
+        self.lines_through = [[line for line in self.lines if line >> b & 1]
+                              for b in range(self.size)]
+
+        # Cells in the order alpha-beta tries them: those on the most
+        # lines first, then those nearest the center
+        self.order = sorted(range(self.size), key=lambda b: (
+            -len(self.lines_through[b]),
+            (2 * self.cells[b][0] - m + 1) ** 2 + (2 * self.cells[b][1] - n + 1) ** 2
+        ))
+
+        # Score of a line holding c marks of one player and none of the other
+        self.weights = [0] + [4 ** c for c in range(1, k)]
+
+        # The symmetries of the board, as maps from a cell to the cell it
+        # takes its mark from, and permute[s][mask], mask with symmetry s
+        # applied to its cells
+        self.symmetries = [
+            lambda i, j: (i, j),
+            lambda i, j: (m - 1 - i, n - 1 - j),
+            lambda i, j: (i, n - 1 - j),
+            lambda i, j: (m - 1 - i, j),
+        ]
+        if m == n:
+            self.symmetries += [
+                lambda i, j: (j, n - 1 - i),
+                lambda i, j: (n - 1 - j, i),
+                lambda i, j: (j, i),
+                lambda i, j: (n - 1 - j, n - 1 - i),
+            ]
+        self.permute = None
+        self.won_table = None
+        if self.size <= TABLE_CELLS:
+            self.permute = [
+                [sum(self.cell_bits[i, j] for i, j in self.cells
+                     if mask & self.cell_bits[transform(i, j)])
+                 for mask in range(self.full + 1)]
+                for transform in self.symmetries
+            ]
+            self.won_table = [self.won(mask) for mask in range(self.full + 1)]
+
+        # Transposition table of exact values: board code -> minimax value.
+        # A code always encodes some board with the same value as the boards
+        # mapped to it, so plain and canonical codes can share the table.
+        self.table = {}
+
+    def to_bits(self, board):
+        """
+        Returns the (xs, os) bitboard of a list board.
+        """
+        xs = os = 0
+        for b, (i, j) in enumerate(self.cells):
+            if board[i][j] == X:
+                xs |= 1 << b
+            elif board[i][j] == O:
+                os |= 1 << b
+        return xs, os
+
+    def from_bits(self, xs, os):
+        """
+        Returns the list board of an (xs, os) bitboard.
+        """
+        return [[X if xs & self.cell_bits[i, j] else O if os & self.cell_bits[i, j] else EMPTY
+                 for j in range(self.n)]
+                for i in range(self.m)]
+
+    def won(self, mask):
+        """
+        Returns True if the cells in mask include a whole line.
+        """
+        if self.won_table is not None:
+            return self.won_table[mask]
+        return any(mask & line == line for line in self.lines)
+
+    def wins(self, mask, b):
+        """
+        Returns True if the cells in mask include a whole line through cell bit b.
+        """
+        return any(mask & line == line for line in self.lines_through[b])
+
+    def terminal(self, xs, os):
+        """
+        Returns True if the game on a bitboard is over, False otherwise.
+        """
+        return self.won(xs) or self.won(os) or xs | os == self.full
+
+    def utility(self, xs, os):
+        """
+        Returns 1 if X has won the game on a bitboard, -1 if O has won, 0 otherwise.
+        """
+        return 1 if self.won(xs) else -1 if self.won(os) else 0
+
+    def evaluate(self, me, them):
+        """
+        Returns a heuristic score of a bitboard for the player whose cells
+        are `me`: the weights of the lines only they hold marks on, less
+        those of the lines only the opponent does.
+        """
+        score = 0
+        weights = self.weights
+        for line in self.lines:
+            mine = me & line
+            theirs = them & line
+            if not theirs:
+                score += weights[mine.bit_count()]
+            elif not mine:
+                score -= weights[theirs.bit_count()]
+        return score
+
+    def code(self, xs, os, symmetry=True):
+        """
+        Returns the code xs << size | os of a bitboard, or with `symmetry`,
+        the smallest code of the board under its symmetries. Symmetry is
+        only used on boards small enough for permutation tables.
+        """
+        if not symmetry or self.permute is None:
+            return xs << self.size | os
+        return min(permute[xs] << self.size | permute[os] for permute in self.permute)
+
+    def canonical(self, xs, os):
+        """
+        Returns (code, s): the smallest code of a bitboard under its
+        symmetries, and the index of the symmetry that gives it.
+        """
+        return min((permute[xs] << self.size | permute[os], s)
+                   for s, permute in enumerate(self.permute))
+
+    def value(self, xs, os, symmetry=True):
+        """
+        Returns the minimax value of a bitboard under perfect play,
+        memoized in the transposition table.
+        """
+        code = self.code(xs, os, symmetry)
+        v = self.table.get(code)
+        if v is not None:
+            return v
+        if self.terminal(xs, os):
+            v = self.utility(xs, os)
+        else:
+            x_to_move = xs.bit_count() == os.bit_count()
+            v = -2 if x_to_move else 2
+            free = self.full & ~(xs | os)
+            while free:
+                bit = free & -free
+                free ^= bit
+                if x_to_move:
+                    v = max(v, self.value(xs | bit, os, symmetry))
+                else:
+                    v = min(v, self.value(xs, os | bit, symmetry))
+        self.table[code] = v
+        return v
+
+    def solve(self):
+        """
+        Fills the transposition table with every reachable position, so
+        minimax can play each move by table lookups.
+        """
+        self.value(0, 0)
+
+    def best_action(self, xs, os, symmetry=True):
+        """
+        Returns the lowest cell (i, j) with the best table value for the
+        player to move on a bitboard, or None if the game is over.
+        """
+        if self.terminal(xs, os):
+            return None
+        x_to_move = xs.bit_count() == os.bit_count()
+        best = None
+        for b in range(self.size):
+            bit = 1 << b
+            if (xs | os) & bit:
+                continue
+            if x_to_move:
+                v = self.value(xs | bit, os, symmetry)
+            else:
+                v = -self.value(xs, os | bit, symmetry)
+            if best is None or v > best_value:
+                best, best_value = self.cells[b], v
+        return best
+
+
+@lru_cache(maxsize=None)
+def get_game(m, n, k):
+    """
+    Returns the Game for an m x n board with k in a row, built once.
+    """
+    return Game(m, n, k)
+
+
+def game_of(board):
+    """
+    Returns the Game matching the shape of a list board and K.
+    """
+    return get_game(len(board), len(board[0]), K)
+
+
+def encode(board, symmetry=True):
+    """
+    Returns the integer code of a list board, as Game.code does.
+    """
+    game = game_of(board)
+    return game.code(*game.to_bits(board), symmetry)
+
+
+def value(board, symmetry=True):
+    """
+    Returns the minimax value of the board under perfect play,
+    memoized in the transposition table.
+    """
+    game = game_of(board)
+    return game.value(*game.to_bits(board), symmetry)
+
+
+def load_book(path=BOOK_FILE):
+    """
+    Loads the opening book at `path` for minimax to serve moves from.
+    Returns True if it was loaded.
+    """
+    global book
+    book = Book.load(path)
+    return book is not None
 
-class Node():
-    def __init__(self, state, v, a, b, successors):
-        self.state = state
-        self.v = v
-        self.a = a
-        self.b = b
-        self.successors = successors
 
 def print_board(board):
     for row in board:
         print(row)
 
-def minimax(board):
+
+class SearchTimeout(Exception):
+    pass
+
+
+# Bounds kept with transposition table entries of a Search
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class Search():
     """
-    Returns the optimal action for the current player on the board.
+    Iterative-deepening alpha-beta search of a Game, without keeping a
+    search tree. Each iteration searches one ply deeper, scoring the
+    positions at its depth limit with Game.evaluate, and tries the best
+    move of the previous iteration first. Searching stops once the time
+    allowed runs out, the result is decided, or the board is full.
     """
-    root = Node(board, -math.inf, -math.inf, math.inf, [])
-    
-    v = 0
 
-    if player(board) is X:
-        v = max_value(root)
-    else:
-        v = min_value(root)
-
-    for successor in root.successors:
-        if successor.v == v:
-            for action in actions(root.state):
-                if result(root.state, action) == successor.state:
-                    return action
-    return None
-
-def max_value(node):
-    if terminal(node.state):
-        value = utility(node.state)
-        node.v = value # must update terminal state's node v value also!!!!!
-        return value
-    node.v = -math.inf
-
-    results = []
-    for action in actions(node.state):
-        results.append(result(node.state, action))
-
-    for successor in results:
-        new_node = Node(successor, math.inf, node.a, node.b, [])
-        node.successors.append(new_node)
-        node.v = max(node.v, min_value(new_node))
-
-        if node.v >= node.b:
-            return node.v
-        node.a = max(node.a, node.v)
-    return node.v
-
-def min_value(node):
-    if terminal(node.state):
-        value = utility(node.state)
-        node.v = value
-        return value
-    node.v = math.inf
-
-    results = []
-    for action in actions(node.state):
-        results.append(result(node.state, action))
-
-    for successor in results:
-        new_node = Node(successor, -math.inf, node.a, node.b, [])
-        node.successors.append(new_node)
-        node.v = min(node.v, max_value(new_node))
-
-        if node.v <= node.a:
-            return node.v
-        node.b = min(node.b, node.v)
-    return node.v
\ No newline at end of file
+    def __init__(self, game, ordering=True, deadline=None):
+        self.game = game
+        self.order = game.order if ordering else range(game.size)
+        self.stop = None if deadline is None else time.monotonic() + deadline
+
+        # Board code -> (depth, bound, value, best cell bit)
+        self.table = {}
+        self.nodes = 0
+        self.depth = 0
+
+    def negamax(self, me, them, last, depth, alpha, beta, ply):
+        """
+        Returns the value of a bitboard for the player to move, whose cells
+        are `me`, searched `depth` plies deep within (alpha, beta). The
+        opponent's last move was cell bit `last`, or -1 at the root.
+        """
+        self.nodes += 1
+        if self.stop is not None and self.nodes & 1023 == 0 and time.monotonic() > self.stop:
+            raise SearchTimeout
+        game = self.game
+        if last >= 0 and game.wins(them, last):
+            return ply - WIN
+        occupied = me | them
+        if occupied == game.full:
+            return 0
+        if depth == 0:
+            return game.evaluate(me, them)
+
+        # Positions have the same ply wherever they are reached,
+        # so win scores can be kept in the table as they are
+        code = me << game.size | them
+        entry = self.table.get(code)
+        moves = self.order
+        if entry is not None:
+            entry_depth, bound, v, hint = entry
+            if entry_depth >= depth and (bound == EXACT
+                                         or bound == LOWER and v >= beta
+                                         or bound == UPPER and v <= alpha):
+                return v
+            moves = [hint] + [b for b in moves if b != hint]
+
+        best, best_b, start = -INF, -1, alpha
+        for b in moves:
+            if occupied >> b & 1:
+                continue
+            v = -self.negamax(them, me | 1 << b, b, depth - 1, -beta, -alpha, ply + 1)
+            if v > best:
+                best, best_b = v, b
+                if v > alpha:
+                    alpha = v
+                    if alpha >= beta:
+                        break
+        bound = UPPER if best <= start else LOWER if best >= beta else EXACT
+        self.table[code] = (depth, bound, best, best_b)
+        return best
+
+    def best_move(self, me, them):
+        """
+        Returns the cell bit of the best move found for the player whose
+        cells are `me` on a bitboard that is not over.
+        """
+        game = self.game
+        occupied = me | them
+        best = next(b for b in self.order if not occupied >> b & 1)
+        for depth in range(1, game.size - occupied.bit_count() + 1):
+            try:
+                v = self.negamax(me, them, -1, depth, -INF, INF, 0)
+            except SearchTimeout:
+                break
+            best = self.table[me << game.size | them][3]
+            self.depth = depth
+            if abs(v) > WIN - game.size:
+                break
+        return best
+
+
+def alphabeta(board, ordering=True, deadline=None):
+    """
+    Returns (action, nodes): the best action found for the current player
+    by iterative-deepening alpha-beta search, and the number of nodes
+    searched. Without a `deadline` in seconds, searches until the result
+    is decided, which is the optimal action.
+
+    With `ordering`, tries cells on the most lines first (on 3 x 3: the
+    center, corners, then edges); otherwise tries cells in row order.
+    """
+    game = game_of(board)
+    xs, os = game.to_bits(board)
+    if game.terminal(xs, os):
+        return None, 1
+    me, them = (xs, os) if bits_player(xs, os) is X else (os, xs)
+    search = Search(game, ordering, deadline)
+    best = search.best_move(me, them)
+    return game.cells[best], search.nodes
+
+
+def minimax(board, memo=True, symmetry=True, deadline=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    With `memo`, plays the lowest perfect-play move from the loaded book
+    if it covers the board, and on boards of up to SOLVE_CELLS cells looks
+    up each successor's value in the transposition table (keyed on its
+    canonical encoding with `symmetry`), searching only positions not in
+    it yet. Otherwise runs a fresh alpha-beta search, which returns its
+    best action so far after `deadline` seconds (DEADLINE by default).
+    """
+    game = game_of(board)
+    if memo and book is not None and book.covers(game):
+        xs, os = game.to_bits(board)
+        entry = book.lookup(game, xs, os)
+        if entry is not None:
+            return game.cells[entry[0][0]]
+        if game.terminal(xs, os):
+            return None
+    if memo and game.size <= SOLVE_CELLS:
+        return game.best_action(*game.to_bits(board), symmetry)
+    if deadline is None:
+        deadline = DEADLINE
+    return alphabeta(board, deadline=deadline)[0]